@@ -25,10 +25,49 @@ __contributors__ = {}
 # This is a url where the most recent plugin package can be downloaded.
 __url__ = '' # 'http://supybot.com/Members/yourname/Scores/download'
 
+import time
+started = time.time()
+
 import config
+import cache
+import httpclient
+import singleflight
+import scoreboard
+import replay
+import timing
+import metrics
+import watch
+import pool
+import teamindex
+import archive
+import packing
+import breaker
+import sports
+import leaderboard
+import draws
+import races
 import plugin
 reload(config)
+reload(cache)
+reload(httpclient)
+reload(singleflight)
+reload(scoreboard)
+reload(replay)
+reload(timing)
+reload(metrics)
+reload(watch)
+reload(pool)
+reload(teamindex)
+reload(archive)
+reload(packing)
+reload(breaker)
+reload(sports)
+reload(leaderboard)
+reload(draws)
+reload(races)
 reload(plugin) # In case we're being reloaded.
+# parsers (and BeautifulSoup) aren't reloaded here. sports.module imports them again on first use.
+plugin.MODULESECONDS = time.time() - started
 # Add more reloads here if you add third-party modules and want them to be
 # reloaded when this plugin is reloaded.  Don't forget to import them as well!
 
@@ -0,0 +1,122 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import json
+import sqlite3
+import datetime
+import threading
+
+# queued games written per transaction.
+BATCH = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (sport TEXT, date TEXT, away TEXT, home TEXT, awayabbr TEXT, homeabbr TEXT,
+                                  awayscore TEXT, homescore TEXT, status TEXT,
+                                  UNIQUE (sport, date, away, home, awayscore, homescore));
+CREATE INDEX IF NOT EXISTS games_date ON games (sport, date);
+CREATE INDEX IF NOT EXISTS games_away ON games (sport, awayabbr, date);
+CREATE INDEX IF NOT EXISTS games_home ON games (sport, homeabbr, date);
+CREATE TABLE IF NOT EXISTS boards (board TEXT PRIMARY KEY, sport TEXT, date TEXT, games TEXT);
+"""
+
+
+def _str(part):
+    """json hands back unicode. everything else here is utf-8 str."""
+
+    return part.encode('utf-8') if isinstance(part, unicode) else part
+
+
+class Archive(object):
+    """sqlite archive of final scores.
+
+    games holds every final game seen, one row each, indexed by sport,
+    date and team. boards holds whole scoreboards of past dates once
+    nothing on them can change anymore, so they can be shown again
+    without going upstream. Games are queued and written BATCH at a time
+    (or on flush()) in one transaction, with the db in WAL mode so
+    readers don't wait on the writes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = []
+        self._seen = set()  # games queued or written since we opened. they don't change.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.text_factory = str
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def add(self, sport, date, away, home, awayscore, homescore, status, awayabbr=None, homeabbr=None, within=None):
+        """Queue a final game. Written with the next batch.
+        within is for pages without dates (a week of CFL games): date is the
+        day we saw it, and the game is left out if the same teams and score
+        were archived in the within days before.
+        """
+
+        row = (sport, date, away, home, awayabbr or away, homeabbr or home, awayscore, homescore, status)
+        key = (row[0],) + row[2:4] + row[6:8] if within else row[:4] + row[6:8]
+        with self._lock:
+            if key in self._seen:
+                return
+            self._seen.add(key)
+            if within:  # seen before we (re)loaded?
+                since = (datetime.datetime.strptime(date, '%Y%m%d') - datetime.timedelta(days=within)).strftime('%Y%m%d')
+                if self._conn.execute("SELECT 1 FROM games WHERE sport = ? AND date >= ? AND away = ? AND home = ? AND awayscore = ? AND homescore = ?",
+                                      (sport, since, away, home, awayscore, homescore)).fetchone():
+                    return
+            self._pending.append(row)
+            if len(self._pending) < BATCH:
+                return
+        self.flush()
+
+    def flush(self):
+        """Write the queued games. Returns how many were queued."""
+
+        with self._lock:
+            (pending, self._pending) = (self._pending, [])
+            if pending:
+                with self._conn:
+                    self._conn.executemany("INSERT OR IGNORE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", pending)
+        return len(pending)
+
+    def putboard(self, board, sport, date, games):
+        """Keep the scoreboard board (key) of date: a list of tuples of strings."""
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO boards VALUES (?, ?, ?, ?)", (board, sport, date, json.dumps(games)))
+
+    def getboard(self, board):
+        """Return the games kept for board or None."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT games FROM boards WHERE board = ?", (board,)).fetchone()
+        if row is None:
+            return None
+        return [tuple([_str(part) for part in game]) for game in json.loads(row[0])]
+
+    def games(self, sport, start, end, team=None):
+        """Return (date, away, home, awayscore, homescore, status) of the final games of
+        sport from start to end (YYYYMMDD, inclusive), only team's (abbreviation) if given.
+        """
+
+        self.flush()
+        query = "SELECT date, away, home, awayscore, homescore, status FROM games WHERE sport = ? AND date BETWEEN ? AND ?"
+        if team:
+            query = "{0} AND awayabbr = ? UNION {0} AND homeabbr = ?".format(query)
+            params = (sport, start, end, team) * 2
+        else:
+            params = (sport, start, end)
+        with self._lock:
+            return sorted([tuple([_str(part) for part in row]) for row in self._conn.execute(query, params)])
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,187 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import os
+import re
+import gc
+import time
+import resource
+import cPickle as pickle
+from base64 import b64decode
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ESPN = b64decode('aHR0cDovL20uZXNwbi5nby5jb20v')
+
+# fixture: (url it stands in for, sport its games are parsed as or None if it isn't a scoreboard).
+PAGES = {'nba': (ESPN + 'nba/scoreboard?&wjb=', 'nba'),
+         'wnba': (ESPN + 'wnba/scoreboard?&wjb=', 'wnba'),
+         'nhl': (ESPN + 'nhl/scoreboard?&wjb=', 'nhl'),
+         'mlb': (ESPN + 'mlb/scoreboard?&wjb=', 'mlb'),
+         'nfl': (ESPN + 'nfl/scoreboard?&wjb=', 'nfl'),
+         'ncf': (ESPN + 'ncf/scoreboard?groupId=999&wjb=', 'ncf'),
+         'ncb': (ESPN + 'ncb/scoreboard?groupId=999&wjb=', 'ncb'),
+         'ncw': (ESPN + 'ncw/scoreboard?groupId=999&wjb=', 'ncb'),
+         'tennis': (ESPN + 'general/tennis/dailyresults?matchType=1&wjb=', None),
+         'tennis-womens': (ESPN + 'general/tennis/dailyresults?matchType=2&wjb=', None),
+         'golf': (ESPN + 'golf/eventresult?seriesId=1&wjb=', None),
+         'golf-ryder': (ESPN + 'golf/eventresult?seriesId=5&wjb=', None),
+         'nascar': (ESPN + 'rpm/nascar/eventresult?seriesId=2&wjb=', None),
+         'racing': (ESPN + 'rpm/eventresult?season=-1&seriesId=6&wjb=', None),
+         'd1bb': (b64decode('aHR0cDovL3d3dy5kMWJhc2ViYWxsLmNvbS9kYWlseS90b2RheS5odG0='), None),
+         'cfl': (b64decode('aHR0cDovL20udHNuLmNhL2NmbA=='), None)}
+
+# (name, command, channel settings). The output of each is kept in fixtures/expected/name.txt.
+CASES = [('nba', 'nba', {}),
+         ('nba.fullteams', 'nba', {'fullteams': True}),
+         ('nba.noansi', 'nba', {'disableANSI': True}),
+         ('nba.linebyline', 'nba', {'lineByLineScores': True}),
+         ('nba-bos', 'nba bos', {}),
+         ('nba-now', 'nba !', {}),
+         ('wnba', 'wnba', {}),
+         ('nhl', 'nhl', {}),
+         ('nhl.fullteams', 'nhl', {'fullteams': True}),
+         ('mlb', 'mlb', {}),
+         ('mlb.fullteams.noansi', 'mlb', {'fullteams': True, 'disableANSI': True}),
+         ('nfl', 'nfl', {}),
+         ('nfl.fullteams', 'nfl', {'fullteams': True}),
+         ('nfl-now', 'nfl !', {}),
+         ('cfb', 'cfb', {}),
+         ('cfb.fullteams', 'cfb', {'fullteams': True}),
+         ('ncb', 'ncb', {}),
+         ('ncb.fullteams', 'ncb', {'fullteams': True}),
+         ('ncw', 'ncw', {}),
+         ('tennis', 'tennis', {}),
+         ('tennis-womens', 'tennis womens', {}),
+         ('tennis-murray', 'tennis mens murray', {}),
+         ('golf', 'golf', {}),
+         ('golf-woods', 'golf woods', {}),
+         ('golf-ryder', 'golf euro', {}),
+         ('nascar', 'nascar', {}),
+         ('racing', 'racing', {}),
+         ('d1bb', 'd1bb', {}),
+         ('d1bb-arizona', 'd1bb arizona', {}),
+         ('cfl', 'cfl', {})]
+
+
+# what the first, and only, line wrapped by limnoria's ircutils.wrap gets in between: a reset, then the formatting reopened.
+WRAPREGEX = re.compile(r'\x0f\s+(?:\x02|\x03\d{0,2}(?:,\d{1,2})?|\x1f|\x16)*')
+# the (N more messages) after the last line sent.
+MOREREGEX = re.compile(r'\s*\x02\(\d+ more messages?\)\x02')
+# cases whose output deliberately differs from fixtures/baseline. {name: why}
+CHANGED = {'racing': "the baseline crashed on accented driver names."}
+
+
+def page(name):
+    """Return the recorded page for fixture name."""
+
+    with open(os.path.join(FIXTURES, name + '.html'), 'rb') as f:
+        return f.read()
+
+
+def seed(responsecache):
+    """Put every fixture in responsecache under the url it stands in for so commands run offline."""
+
+    for (name, (url, sport)) in PAGES.items():
+        responsecache.set(url, page(name), 86400)
+
+
+def expected(name):
+    """Return the recorded output lines of case name or None if not recorded yet."""
+
+    path = os.path.join(FIXTURES, 'expected', name + '.txt')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read().split('\n')[:-1]
+
+
+def baseline(name):
+    """Return the output lines of case name from fixtures/baseline or None.
+    Those were recorded once from the plugin as it was before the strainer
+    parser and Game records, and are never re-recorded.
+    """
+
+    path = os.path.join(FIXTURES, 'baseline', name + '.txt')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read().split('\n')[:-1]
+
+
+def words(lines):
+    """Return the text of lines as one string of words, formatting kept.
+    Where lines were broken, (N more messages) and the | between games
+    are left out, so output packed differently compares equal.
+    """
+
+    text = MOREREGEX.sub('', WRAPREGEX.sub(' ', ' '.join(lines)))
+    return ' '.join(text.replace(' | ', ' ').split())
+
+
+def record(name, lines):
+    """Save lines as the expected output of case name."""
+
+    path = os.path.join(FIXTURES, 'expected')
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    with open(os.path.join(path, name + '.txt'), 'wb') as f:
+        f.write(''.join([line + '\n' for line in lines]))
+
+
+def measure(f, repeat=20):
+    """Run f in a forked child and return a dict of what it cost.
+    first is the wall time in ms of the first (cold) call and best/mean
+    that of the repeat calls after it. objects is how many more gc-tracked
+    objects there are after the first call than before, with gc off
+    (BeautifulSoup trees are cyclic, so this counts them) and peakkb is how much it raised
+    the child's max RSS.
+    """
+
+    (r, w) = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child.
+        os.close(r)
+        try:
+            gc.collect()
+            gc.disable()
+            (before, objects) = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(gc.get_objects()))
+            start = time.time()
+            f()
+            first = (time.time() - start) * 1000
+            stats = {'first': first, 'objects': len(gc.get_objects()) - objects, 'peakkb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before}
+            gc.enable()
+            gc.collect()
+            times = []
+            for i in range(repeat):
+                start = time.time()
+                f()
+                times.append((time.time() - start) * 1000)
+            stats.update({'best': min(times), 'mean': sum(times) / len(times), 'runs': repeat})
+            os.write(w, pickle.dumps(stats, 2))
+        finally:
+            os._exit(0)
+    os.close(w)
+    chunks = []
+    while True:
+        chunk = os.read(r, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(r)
+    os.waitpid(pid, 0)
+    if not chunks:  # child died before reporting.
+        raise RuntimeError("benchmark child did not report.")
+    return pickle.loads(''.join(chunks))
+
+
+def report(rows):
+    """Format [(label, measure() dict)] as a table."""
+
+    lines = ["{0:<28} {1:>10} {2:>5} {3:>10} {4:>10} {5:>9} {6:>9}".format('benchmark', 'first ms', 'runs', 'best ms', 'mean ms', 'objects', 'peak KB')]
+    for (label, stats) in rows:
+        lines.append("{0:<28} {1:>10.2f} {2:>5} {3:>10.2f} {4:>10.2f} {5:>9} {6:>9}".format(label, stats['first'], stats['runs'], stats['best'], stats['mean'], stats['objects'], stats['peakkb']))
+    return "\n".join(lines)
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,111 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import time
+import urlparse
+import threading
+# supybot libs
+import supybot.utils as utils
+
+
+class CircuitOpen(utils.web.Error):
+    """Raised instead of going upstream while a circuit is open."""
+    pass
+
+
+def key(url):
+    """Return the (host, path) url is broken on. Same as httpclient's stats."""
+
+    (scheme, netloc, path, query, frag) = urlparse.urlsplit(url)
+    return (netloc, path)
+
+
+def transient(e):
+    """Is e the kind of failure that means the host/path is in trouble?
+    Timeouts, connection errors and 5xx are. A 4xx is about the one url
+    (ex: a bad date), so it doesn't count against the others on the path.
+    """
+
+    status = getattr(e, 'status', None)
+    return status is None or status >= 500
+
+
+class Circuit(object):
+    """State of one host/path.
+
+    closed until threshold fetches in a row fail, then open for backoff
+    seconds. After that, one caller is let through as a probe (probing):
+    if it works we close again, if it fails we open for twice as long,
+    up to maxbackoff.
+    """
+
+    __slots__ = ('failures', 'opens', 'until', 'probing')
+
+    def __init__(self):
+        self.failures = 0
+        self.opens = 0  # times opened since the last success. backoff doubles with each.
+        self.until = 0  # open until this time.
+        self.probing = False
+
+    def state(self, now):
+        if self.probing:
+            return 'probing'
+        return 'open' if self.until > now else 'closed'
+
+
+class Breakers(object):
+    """Circuit breakers for upstream, one per (host, path)."""
+
+    def __init__(self, threshold=3, backoff=30, maxbackoff=600):
+        self.configure(threshold, backoff, maxbackoff)
+        self.circuits = {}
+        self.rejected = 0  # fetches we answered without going upstream.
+        self._lock = threading.Lock()
+
+    def configure(self, threshold, backoff, maxbackoff):
+        (self.threshold, self.backoff, self.maxbackoff) = (threshold, backoff, maxbackoff)
+
+    def allow(self, url):
+        """Can we go upstream for url? Raises CircuitOpen if not. Once the
+        backoff is over, the first caller is let through to probe.
+        """
+
+        now = time.time()
+        with self._lock:
+            circuit = self.circuits.get(key(url))
+            if circuit is None or (circuit.until <= now and not circuit.probing):
+                if circuit and circuit.opens:  # we're the probe.
+                    circuit.probing = True
+                return
+            self.rejected += 1
+            wait = max(0, int(circuit.until - now))
+        raise CircuitOpen("{0}{1} is failing. Trying it again in {2}s.".format(key(url)[0], key(url)[1], wait))
+
+    def success(self, url):
+        with self._lock:
+            self.circuits.pop(key(url), None)
+
+    def failure(self, url):
+        """Count a failed fetch of url. Returns True if that opened its circuit."""
+
+        now = time.time()
+        with self._lock:
+            circuit = self.circuits.setdefault(key(url), Circuit())
+            circuit.failures += 1
+            if not circuit.probing and circuit.failures < self.threshold:
+                return False
+            circuit.probing = False
+            circuit.until = now + min(self.maxbackoff, self.backoff * 2 ** circuit.opens)
+            circuit.opens += 1
+            return True
+
+    def states(self):
+        """Return {(host, path): (state, failures, seconds left open)} of the circuits with failures."""
+
+        now = time.time()
+        with self._lock:
+            return dict([(k, (c.state(now), c.failures, max(0, c.until - now))) for (k, c) in self.circuits.items()])
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,204 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheEntry(object):
+    """A single cached upstream response and its validators."""
+
+    __slots__ = ('body', 'size', 'expires', 'etag', 'lastmodified')
+
+    def __init__(self, body, ttl, etag=None, lastmodified=None):
+        self.body = body
+        self.size = len(body)
+        self.expires = time.time() + ttl
+        self.etag = etag
+        self.lastmodified = lastmodified
+
+
+class ResponseCache(object):
+    """LRU cache of upstream responses keyed by full URL.
+
+    Each entry expires after its own TTL. Expired entries that carry an
+    ETag or Last-Modified are kept around so the fetch layer can revalidate
+    them with a conditional GET. The cache is bounded by the total size of
+    the bodies it holds: once that goes over maxbytes, the least recently
+    used entries are evicted until it fits again.
+    """
+
+    def __init__(self, maxbytes):
+        self.maxbytes = maxbytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        """Remove key and return its entry. Caller holds the lock."""
+
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.size -= entry.size
+        return entry
+
+    def _evict(self):
+        """Evict least recently used entries until we fit. Caller holds the lock."""
+
+        while self.size > self.maxbytes and self._entries:
+            (key, entry) = self._entries.popitem(last=False)
+            self.size -= entry.size
+            self.evictions += 1
+
+    def get(self, key):
+        """Return the cached body for key or None if missing/expired."""
+
+        with self._lock:
+            entry = self._drop(key)
+            if entry and (entry.etag or entry.lastmodified or entry.expires > time.time()):
+                # re-insert so it becomes the most recently used.
+                self._entries[key] = entry
+                self.size += entry.size
+            if not entry or entry.expires <= time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.body
+
+    def validators(self, key):
+        """Return (etag, lastmodified) of the entry for key, fresh or not."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return (None, None)
+            return (entry.etag, entry.lastmodified)
+
+    def revalidate(self, key, ttl):
+        """Upstream said our copy of key is still good (304). Make it fresh
+        for another ttl seconds and return the body, or None if it's gone.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            entry.expires = time.time() + ttl
+            self.revalidations += 1
+            return entry.body
+
+    def set(self, key, body, ttl, etag=None, lastmodified=None):
+        """Store body under key for ttl seconds."""
+
+        if (ttl <= 0 and not etag and not lastmodified) or len(body) > self.maxbytes:  # uncacheable.
+            return
+        entry = CacheEntry(body, ttl, etag=etag, lastmodified=lastmodified)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            self.size += entry.size
+            self._evict()
+
+    def resize(self, maxbytes):
+        """Change the byte bound, evicting if we are now over it."""
+
+        with self._lock:
+            self.maxbytes = maxbytes
+            self._evict()
+
+    def flush(self):
+        """Empty the cache and return how many entries were dropped."""
+
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self.size = 0
+            return count
+
+    def stats(self):
+        """Return a dict of counters for display."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'size': self.size, 'maxbytes': self.maxbytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'revalidations': self.revalidations,
+                    'hitrate': (100.0 * self.hits / lookups) if lookups else 0.0}
+
+
+class Board(object):
+    """A parsed scoreboard and the page it was parsed from.
+
+    expires is only set for boards kept warm by the refresher (or with no
+    games). Until then, commands can use the board without going through
+    the fetch layer. rendered holds the output lines per render variant. A
+    changed page gets a new Board, so those never go stale. stale is set
+    while upstream fails to give us a newer page than the one fetched at
+    fetched.
+    """
+
+    __slots__ = ('html', 'games', 'expires', 'rendered', 'stale', 'fetched')
+
+    def __init__(self, html, games, expires=0):
+        self.html = html
+        self.games = games
+        self.expires = expires
+        self.rendered = {}
+        self.stale = False
+        self.fetched = time.time()
+
+
+class BoardCache(object):
+    """LRU cache of parsed scoreboards keyed by URL, bounded by count."""
+
+    def __init__(self, maxboards):
+        self.maxboards = maxboards
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._boards)
+
+    def get(self, key):
+        """Return the Board for key or None."""
+
+        with self._lock:
+            board = self._boards.pop(key, None)
+            if board:
+                self._boards[key] = board
+            return board
+
+    def set(self, key, board):
+        """Store board under key, dropping the oldest boards if full."""
+
+        with self._lock:
+            self._boards.pop(key, None)
+            self._boards[key] = board
+            while len(self._boards) > self.maxboards:
+                self._boards.popitem(last=False)
+
+    def flushrendered(self):
+        """Forget the rendered lines of every board but keep the parsed games."""
+
+        with self._lock:
+            for board in self._boards.values():
+                board.rendered = {}
+
+    def flush(self):
+        """Drop every board and return how many there were."""
+
+        with self._lock:
+            count = len(self._boards)
+            self._boards.clear()
+            return count
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -11,6 +11,11 @@ from supybot.i18n import PluginInternationalization, internationalizeDocstring
 _ = PluginInternationalization('Scores')
 
 
+class ScoreboardParser(registry.OnlySomeStrings):
+    """Must be one of: strainer, soup."""
+    validStrings = ('strainer', 'soup')
+
+
 def configure(advanced):
     # This will be called by supybot to configure this module.  advanced is
     # a bool that specifies whether the user identified himself as an advanced
@@ -23,8 +28,78 @@ def configure(advanced):
 Scores = conf.registerPlugin('Scores')
 conf.registerChannelValue(Scores, 'disableANSI', registry.Boolean(False, """Do not display any ANSI (color/bold) in output."""))
 conf.registerChannelValue(Scores, 'fullteams', registry.Boolean(False, """Display full team names in output for channel? (Uses db)"""))
-conf.registerChannelValue(Scores, 'lineByLineScores', registry.Boolean(False, """Display full team names in output for channel? (Uses db)"""))
+conf.registerChannelValue(Scores, 'lineByLineScores', registry.Boolean(False, """Display one game per line instead of as many as fit. Lines past supybot.reply.mores.instant wait for the more command."""))
 conf.registerGlobalValue(Scores, 'logURLs', registry.Boolean(False, """Should we log all URL calls?"""))
+conf.registerGlobalValue(Scores, 'parser', ScoreboardParser('strainer', """How scoreboards are parsed. strainer only builds the game blocks, soup builds the whole page (old parser)."""))
 conf.registerGlobalValue(Scores, 'wilbonton', registry.Boolean(False, """DONT TURN THIS ON UNLESS YOU KNOW WHAT IT IS."""))
+# response cache in front of all upstream fetches.
+conf.registerGroup(Scores, 'cache')
+conf.registerGlobalValue(Scores.cache, 'maxBytes', registry.PositiveInteger(4194304, """Maximum total size (bytes) of upstream pages held in the response cache."""))
+conf.registerGlobalValue(Scores.cache, 'honorMaxAge', registry.Boolean(True, """Use upstream's Cache-Control max-age as the TTL when it sends one."""))
+conf.registerGlobalValue(Scores.cache, 'emptyTTL', registry.NonNegativeInteger(120, """Seconds a scoreboard with no games is used without asking upstream again. 0 disables."""))
+conf.registerGroup(Scores.cache, 'ttl')
+conf.registerGlobalValue(Scores.cache.ttl, 'default', registry.NonNegativeInteger(60, """Seconds to cache pages without a sport specific TTL. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'nba', registry.NonNegativeInteger(30, """Seconds to cache NBA scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'wnba', registry.NonNegativeInteger(30, """Seconds to cache WNBA scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'nhl', registry.NonNegativeInteger(30, """Seconds to cache NHL scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'mlb', registry.NonNegativeInteger(30, """Seconds to cache MLB scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'nfl', registry.NonNegativeInteger(30, """Seconds to cache NFL scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'ncf', registry.NonNegativeInteger(30, """Seconds to cache college football scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'ncb', registry.NonNegativeInteger(30, """Seconds to cache college basketball scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'ncw', registry.NonNegativeInteger(30, """Seconds to cache women's college basketball scoreboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'tennis', registry.NonNegativeInteger(60, """Seconds to cache tennis results. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'golf', registry.NonNegativeInteger(120, """Seconds to cache golf leaderboards. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'nascar', registry.NonNegativeInteger(30, """Seconds to cache NASCAR results. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'racing', registry.NonNegativeInteger(60, """Seconds to cache F1/Indycar results. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'd1bb', registry.NonNegativeInteger(60, """Seconds to cache D1 baseball scores. 0 disables."""))
+conf.registerGlobalValue(Scores.cache.ttl, 'cfl', registry.NonNegativeInteger(60, """Seconds to cache CFL scores. 0 disables."""))
+# keep-alive connection pool for upstream fetches.
+conf.registerGroup(Scores, 'http')
+conf.registerGlobalValue(Scores.http, 'poolSize', registry.PositiveInteger(4, """Idle keep-alive connections kept open per upstream host."""))
+conf.registerGlobalValue(Scores.http, 'connectTimeout', registry.PositiveFloat(5.0, """Seconds to wait when connecting to an upstream host."""))
+conf.registerGlobalValue(Scores.http, 'readTimeout', registry.PositiveFloat(15.0, """Seconds to wait for each read from an upstream host."""))
+conf.registerGlobalValue(Scores.http, 'fetchers', registry.PositiveInteger(4, """Most boards fetched at once by commands that fetch several (date ranges, tennis all). Takes effect when the plugin is (re)loaded."""))
+conf.registerGlobalValue(Scores.http, 'proxy', registry.String('', """HTTP proxy for upstream requests, ex: the replay.py stand-in at http://127.0.0.1:8080. Empty uses supybot.protocols.http.proxy."""))
+# record/replay.
+conf.registerGroup(Scores, 'record')
+conf.registerGlobalValue(Scores.record, 'enabled', registry.Boolean(False, """Save every upstream page to record.directory so it can be replayed with replay.py."""))
+conf.registerGlobalValue(Scores.record, 'directory', registry.String('', """Where recordings are saved. Empty is ScoresRecordings in the bot's data directory."""))
+# archive of final scores.
+conf.registerGroup(Scores, 'archive')
+conf.registerGlobalValue(Scores.archive, 'enabled', registry.Boolean(True, """Keep final scores in ScoresArchive.db in the bot's data directory and answer past dates from it. Takes effect when the plugin is (re)loaded."""))
+# scores overview.
+conf.registerGroup(Scores, 'overview')
+conf.registerGlobalValue(Scores.overview, 'poolSize', registry.PositiveInteger(8, """Most boards the scores command fetches at once, in a pool of its own. 8 fetches every sport at once. Takes effect when the plugin is (re)loaded."""))
+conf.registerGlobalValue(Scores.overview, 'deadline', registry.PositiveFloat(4.0, """Seconds the scores command waits for a sport once its fetch has started before leaving it out (timed out). A sport whose fetch hasn't started within twice this is left out too (not fetched)."""))
+# circuit breakers for upstream.
+conf.registerGroup(Scores, 'breaker')
+conf.registerGlobalValue(Scores.breaker, 'threshold', registry.PositiveInteger(3, """Failed fetches in a row of an upstream host/path before we stop asking it for a while."""))
+conf.registerGlobalValue(Scores.breaker, 'backoff', registry.PositiveInteger(30, """Seconds before the first retry of a host/path we stopped asking. Doubles with each failed retry."""))
+conf.registerGlobalValue(Scores.breaker, 'maxBackoff', registry.PositiveInteger(600, """Most seconds between retries of a host/path we stopped asking."""))
+# date ranges.
+conf.registerGroup(Scores, 'range')
+conf.registerGlobalValue(Scores.range, 'maxDays', registry.PositiveInteger(14, """Most days nba/nhl/mlb/ncb --from/--to can span."""))
+# golf leaderboards.
+conf.registerGroup(Scores, 'golf')
+conf.registerGlobalValue(Scores.golf, 'around', registry.PositiveInteger(2, """Positions shown either side of the player golf --around is asked about."""))
+# team watches.
+conf.registerGroup(Scores, 'watch')
+conf.registerGlobalValue(Scores.watch, 'interval', registry.PositiveInteger(30, """Seconds between polls of the boards with watched teams."""))
+# race tracker.
+conf.registerGroup(Scores, 'races')
+conf.registerGlobalValue(Scores.races, 'enabled', registry.Boolean(False, """Poll the NASCAR/F1/Indycar results in the background so nascar movers and racing gaps have snapshots of live races."""))
+conf.registerGlobalValue(Scores.races, 'interval', registry.PositiveInteger(30, """Seconds between polls of a series while its race is live."""))
+conf.registerGlobalValue(Scores.races, 'idleInterval', registry.PositiveInteger(600, """Seconds between polls of a series with no live race."""))
+conf.registerGlobalValue(Scores.races, 'snapshots', registry.PositiveInteger(60, """Position snapshots kept per driver. Takes effect when the plugin is (re)loaded."""))
+conf.registerGlobalValue(Scores.races, 'window', registry.PositiveInteger(10, """Polls nascar movers and racing gaps look back over by default."""))
+# prometheus metrics.
+conf.registerGroup(Scores, 'metrics')
+conf.registerGlobalValue(Scores.metrics, 'enabled', registry.Boolean(False, """Serve Prometheus metrics at /scores/metrics on supybot's HTTP server (supybot.servers.http). Takes effect when the plugin is (re)loaded."""))
+# background refresher that keeps the main scoreboards warm.
+conf.registerGroup(Scores, 'refresh')
+conf.registerGlobalValue(Scores.refresh, 'enabled', registry.Boolean(False, """Keep the nba/nhl/mlb/nfl/cfb/ncb/ncw/wnba scoreboards warm in the background."""))
+conf.registerGlobalValue(Scores.refresh, 'sports', registry.SpaceSeparatedListOfStrings(['nba', 'wnba', 'nhl', 'mlb', 'nfl', 'ncf', 'ncb', 'ncw'], """Sports the refresher keeps warm. (ncf is cfb)"""))
+conf.registerGlobalValue(Scores.refresh, 'liveInterval', registry.PositiveInteger(30, """Seconds between refreshes of a sport while any of its games are live."""))
+conf.registerGlobalValue(Scores.refresh, 'idleInterval', registry.PositiveInteger(600, """Seconds between refreshes of a sport when all its games are scheduled or final."""))
 
 # vim:set shiftwidth=4 tabstop=4 expandtab textwidth=250:
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+"""Audit the teams table against recorded scoreboard pages.
+
+Reads recordings (record.directory, see replay.py) and/or .html pages
+(named after their sport, ex: fixtures/ncf.html or ncb-20140301.html),
+parses every distinct scoreboard page once and prints the INSERTs for the
+team abbreviations the teams table doesn't have, ready for scores.sql.
+Runs offline. Ex: python db/auditteams.py ~/bot/data/ScoresRecordings fixtures >> db/scores.sql
+Upstream pages only carry the abbreviation, so it stands in for the full
+name until someone fills it in. The comment after each INSERT says where
+the team was seen.
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+
+# the plugin's own parsers, so we see teams exactly as the commands do.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parsers
+import replay
+import scoreboard
+
+DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.db')
+# sport of a scoreboard url or page name and the sport its teams are kept under.
+SPORTS = {'nba': 'nba', 'wnba': 'wnba', 'nhl': 'nhl', 'mlb': 'mlb', 'nfl': 'nfl', 'ncf': 'ncf', 'ncb': 'ncb', 'ncw': 'ncb'}
+# sport of an upstream scoreboard url.
+URLREGEX = re.compile(r'^https?://[^/]+/(?P<sport>[a-z]+)/scoreboard\?')
+# sport of a page's file name.
+NAMEREGEX = re.compile(r'^(?P<sport>[a-z]+)')
+
+
+def pages(paths):
+    """Yield (sport, where, html) for every distinct scoreboard page under paths.
+    A page recorded many times (same body) is only read once.
+    """
+
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path) and os.path.exists(os.path.join(path, 'index')):  # a recording.
+            store = replay.Store(path)
+            for (url, fetches) in sorted(store.index().items()):
+                m = URLREGEX.match(url)
+                if not m or m.group('sport') not in SPORTS:
+                    continue
+                for sha in set([sha for (fetched, sha) in fetches]) - seen:
+                    seen.add(sha)
+                    yield (SPORTS[m.group('sport')], url, store.get(sha))
+            continue
+        files = [os.path.join(path, f) for f in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        for f in files:
+            m = NAMEREGEX.match(os.path.basename(f))
+            if not f.endswith('.html') or not m or m.group('sport') not in SPORTS or f in seen:
+                continue
+            seen.add(f)
+            with open(f) as page:
+                yield (SPORTS[m.group('sport')], f, page.read())
+
+
+def extract(corpus):
+    """Return ({sport: {abbreviation: (games seen in, where first seen)}}, pages read) for the teams in corpus."""
+
+    found, count = {}, 0
+    for (sport, where, html) in corpus:
+        count += 1
+        teams = found.setdefault(sport, {})
+        for block in parsers.gameblocks(html):
+            game = scoreboard.parsegame(block.getText().split(',', 1)[0])
+            if not game:
+                continue
+            for abbr in game.teams():
+                (games, first) = teams.get(abbr, (0, where))
+                teams[abbr] = (games + 1, first)
+    return (found, count)
+
+
+def known(db):
+    """Return {sport: set(abbreviations)} of the teams table, in one query."""
+
+    teams = {}
+    conn = sqlite3.connect(db)
+    try:
+        for (sport, short) in conn.execute("SELECT sport, short FROM teams"):
+            teams.setdefault(str(sport), set()).add(str(short))
+    finally:
+        conn.close()
+    return teams
+
+
+def _quote(s):
+    return s.replace("'", "''")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Print the INSERTs for teams seen on recorded scoreboards but missing from the teams table.")
+    parser.add_argument('paths', nargs='+', help="recording directories (record.directory), directories of .html pages or .html pages.")
+    parser.add_argument('--db', default=DB, help="teams database. default: {0}".format(DB))
+    args = parser.parse_args(argv)
+    started = time.time()
+    (found, count) = extract(pages(args.paths))
+    have = known(args.db)
+    missing = 0
+    for sport in sorted(found):
+        for abbr in sorted(set(found[sport]) - have.get(sport, set())):  # one set difference per sport.
+            (games, where) = found[sport][abbr]
+            print "INSERT INTO teams (sport, full, short) VALUES ('{0}', '{1}', '{1}');  -- {2} games, first in {3}".format(sport, _quote(abbr), games, where)
+            missing += 1
+    sys.stderr.write("Audited {0} pages ({1} teams in {2} sports) in {3:.2f}s. {4} missing.\n".format(count, sum([len(t) for t in found.values()]), len(found), time.time() - started, missing))
+    return 1 if missing else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
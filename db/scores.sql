@@ -807,3 +807,94 @@ INSERT INTO teams (sport, full, short) VALUES ('ncb', 'Southeastern Louisiana Li
 INSERT INTO teams (sport, full, short) VALUES ('ncb', 'Northern Kentucky Norse', 'NKU');
 INSERT INTO teams (sport, full, short) VALUES ('ncb', 'Texas-Pan American Broncs', 'UTPA');
 INSERT INTO teams (sport, full, short) VALUES ('ncb', 'Bradley Braves', 'BRAD');
+CREATE TABLE aliases (sport TEXT, alias TEXT, short TEXT);
+/* NBA aliases */
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'sixers', 'PHI');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'cavs', 'CLE');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'mavs', 'DAL');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'blazers', 'POR');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'wolves', 'MIN');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'dubs', 'GSW');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'clips', 'LAC');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'nets', 'BKN');
+INSERT INTO aliases (sport, alias, short) VALUES ('nba', 'okc', 'OKC');
+/* NHL aliases */
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'habs', 'MON');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'leafs', 'TOR');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'bolts', 'TAM');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'pens', 'PIT');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'caps', 'WAS');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'hawks', 'CHI');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'jackets', 'CLS');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'canes', 'CAR');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'isles', 'NYI');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'avs', 'COL');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'sens', 'OTT');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'preds', 'NSH');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'nucks', 'VAN');
+INSERT INTO aliases (sport, alias, short) VALUES ('nhl', 'wings', 'DET');
+/* MLB aliases */
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'yanks', 'NYY');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'sox', 'BOS');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'sox', 'CHW');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'jays', 'TOR');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'cards', 'STL');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'dbacks', 'ARI');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'halos', 'LAA');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'bucs', 'PIT');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'nats', 'WAS');
+INSERT INTO aliases (sport, alias, short) VALUES ('mlb', 'o''s', 'BAL');
+/* NFL aliases */
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'pats', 'NE');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'niners', 'SF');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'bucs', 'TB');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'skins', 'WSH');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'g-men', 'NYG');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'jags', 'JAX');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'phins', 'MIA');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'bolts', 'SD');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'pack', 'GB');
+INSERT INTO aliases (sport, alias, short) VALUES ('nfl', 'boys', 'DAL');
+/* NCF aliases */
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'bama', 'ALA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'the u', 'MIA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'canes', 'MIA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'noles', 'FSU');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'vols', 'TENN');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'huskers', 'NEB');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'dawgs', 'UGA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'mizzou', 'MIZZ');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'horns', 'TEX');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'bucks', 'OSU');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'a&m', 'TA&M');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'uconn', 'CONN');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'cuse', 'SYR');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'nova', 'VILL');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'zona', 'ARIZ');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'ole miss', 'MISS');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'tide', 'ALA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'irish', 'ND');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'hogs', 'ARK');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncf', 'cocks', 'SCAR');
+/* NCB aliases */
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'bama', 'ALA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'the u', 'MIA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'canes', 'MIA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'noles', 'FSU');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'vols', 'TENN');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'dawgs', 'UGA');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'mizzou', 'MIZZ');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'horns', 'TEX');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'bucks', 'OSU');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'a&m', 'TA&M');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'uconn', 'CONN');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'cuse', 'SYR');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'nova', 'VILL');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'zona', 'ARIZ');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'zags', 'GONZ');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'hoyas', 'GTWN');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'marquette', 'MARQ');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'x', 'XAV');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'hogs', 'ARK');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'heels', 'UNC');
+INSERT INTO aliases (sport, alias, short) VALUES ('ncb', 'cats', 'UK');
@@ -0,0 +1,77 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import re
+
+from teamindex import normalize
+
+# the draws tennis can show: (name on the command line, matchType).
+DRAWS = (('mens', '1'), ('womens', '2'), ('mensdoubles', '3'), ('womensdoubles', '4'), ('mixeddoubles', '6'))
+# splits a match into its two sides. Ex: Novak Djokovic (1) d. Rafael Murray 7-3, 6-2
+SIDESREGEX = re.compile(r'\s+(?:d\.|def\.|vs\.?)\s+')
+
+
+def players(text):
+    """Return the normalized names of the players in a match's text.
+    Seeds, countries and the score are dropped. Doubles partners are split on /.
+    """
+
+    names = []
+    for side in SIDESREGEX.split(text, 1):
+        words = []
+        for word in side.split():
+            if word[0].isdigit() or word[0] == '(':  # seed, country or the score from here on.
+                break
+            words.append(word)
+        names.extend([normalize(name) for name in " ".join(words).split('/') if normalize(name)])
+    return names
+
+
+class Match(object):
+    """One match of a draw. status and text are kept as upstream sent them."""
+
+    __slots__ = ('status', 'text', 'players')
+
+    def __init__(self, status, text):
+        self.status = status
+        self.text = text
+        self.players = players(text)
+
+    def final(self):
+        return self.status == "Final"
+
+
+class Draw(object):
+    """A parsed draw (matchType) page.
+
+    names maps each player's surname and whole name to the rows of their
+    matches so find() is a dict lookup. A query that is neither (a first
+    name, a country, 2nd set) falls back to a scan of the matches. note is set
+    instead of matches when there is nothing to show.
+    """
+
+    def __init__(self, name, title, round, matches, note=None):
+        self.name = name
+        self.title = title
+        self.round = round
+        self.matches = matches
+        self.note = note
+        self.names = {}  # normalized surname or full name: [row, ...]
+        for (i, match) in enumerate(matches):
+            for player in match.players:
+                for key in set([player, player.split()[-1]]):
+                    self.names.setdefault(key, []).append(i)
+
+    def find(self, query):
+        """Return the matches query names, in draw order."""
+
+        query = normalize(query)
+        if not query:
+            return []
+        if query in self.names:
+            return [self.matches[i] for i in self.names[query]]
+        return [match for match in self.matches if query in normalize("{0} {1}".format(match.status, match.text))]
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
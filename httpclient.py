@@ -0,0 +1,246 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import re
+import gzip
+import time
+import zlib
+import socket
+import urllib
+import httplib
+import urlparse
+import threading
+from cStringIO import StringIO
+# supybot libs
+import supybot.utils as utils
+
+MAXAGEREGEX = re.compile(r'max-age\s*=\s*"?(\d+)')
+# upper bounds (seconds) of the fetch latency histogram buckets.
+LATENCYBUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class HTTPError(utils.web.Error):
+    """An HTTP error status from upstream. status is the code."""
+
+    def __init__(self, status):
+        utils.web.Error.__init__(self, 'HTTP Error %s: %s' % (status, httplib.responses.get(status, '')))
+        self.status = status
+
+
+class Response(object):
+    """Status, headers and (decoded) body of an upstream response."""
+
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class PathStats(object):
+    """Fetch counters of one upstream host/path. buckets[i] counts the
+    fetches that took LATENCYBUCKETS[i] seconds or less, like a
+    Prometheus histogram.
+    """
+
+    __slots__ = ('fetches', 'errors', 'notmodified', 'seconds', 'buckets')
+
+    def __init__(self):
+        (self.fetches, self.errors, self.notmodified, self.seconds) = (0, 0, 0, 0.0)
+        self.buckets = [0] * len(LATENCYBUCKETS)
+
+    def add(self, seconds, error=False, notmodified=False):
+        self.fetches += 1
+        self.errors += error
+        self.notmodified += notmodified
+        self.seconds += seconds
+        for (i, bound) in enumerate(LATENCYBUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+def _decode(body, encoding):
+    """Undo gzip/deflate Content-Encoding."""
+
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.GzipFile(fileobj=StringIO(body)).read()
+    elif encoding == 'deflate':
+        try:  # zlib wrapped.
+            return zlib.decompress(body)
+        except zlib.error:  # some servers send raw deflate.
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def maxage(headers):
+    """Return the Cache-Control max-age of a response in seconds.
+    no-cache/no-store count as 0. None if upstream does not say.
+    """
+
+    cc = (headers.get('Cache-Control') or '').lower()
+    if 'no-cache' in cc or 'no-store' in cc:
+        return 0
+    m = MAXAGEREGEX.search(cc)
+    if m:
+        return int(m.group(1))
+    return None
+
+
+class HTTPClient(object):
+    """Small HTTP/1.1 client that keeps idle keep-alive connections per
+    upstream host and reuses them, instead of opening a new TCP connection
+    for every fetch like utils.web/urllib2 do.
+
+    At most poolsize idle connections are kept per host. connecttimeout
+    bounds connection setup and readtimeout every read after that.
+    """
+
+    def __init__(self, poolsize=4, connecttimeout=5, readtimeout=15):
+        self.poolsize = poolsize
+        self.connecttimeout = connecttimeout
+        self.readtimeout = readtimeout
+        self.connects = 0
+        self.reuses = 0
+        self.paths = {}  # (host, path): PathStats of every get().
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def configure(self, poolsize, connecttimeout, readtimeout):
+        """Apply new settings. Idle connections over the new pool size are closed."""
+
+        (self.poolsize, self.connecttimeout, self.readtimeout) = (poolsize, connecttimeout, readtimeout)
+        with self._lock:
+            for conns in self._idle.values():
+                while len(conns) > poolsize:
+                    conns.pop(0).close()
+
+    def _acquire(self, key):
+        """Return (connection, reused) for key, reusing an idle one if we have it."""
+
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                self.reuses += 1
+                return (conns.pop(), True)
+            self.connects += 1
+        (scheme, host, port) = key
+        if scheme == 'https':
+            conn = httplib.HTTPSConnection(host, port, timeout=self.connecttimeout)
+        else:
+            conn = httplib.HTTPConnection(host, port, timeout=self.connecttimeout)
+        conn.connect()
+        conn.sock.settimeout(self.readtimeout)
+        return (conn, False)
+
+    def _release(self, key, conn):
+        """Put conn back in the pool or close it if the pool is full."""
+
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.poolsize:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+    def _request(self, url, headers, proxy=None):
+        """Do a single GET for url over a pooled connection. Returns a Response."""
+
+        (scheme, netloc, path, query, frag) = urlparse.urlsplit(url)
+        httpProxy = proxy or utils.force(utils.web.proxy)
+        if httpProxy and scheme == 'http':  # talk to the proxy and ask it for the full url.
+            (phost, pport) = urllib.splitport(httpProxy.split('://')[-1].rstrip('/'))
+            (key, target) = (('http', phost, int(pport or 80)), url)
+        else:
+            (host, port) = urllib.splitport(netloc)
+            (key, target) = ((scheme, host, int(port or (443 if scheme == 'https' else 80))), path + ('?' + query if query else '') or '/')
+        for attempt in (1, 2):
+            (conn, reused) = self._acquire(key)
+            try:
+                conn.request('GET', target, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (httplib.BadStatusLine, httplib.IncompleteRead, socket.error):
+                conn.close()
+                if reused and attempt == 1:  # upstream closed an idle connection on us. try a fresh one.
+                    continue
+                raise
+            except:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return Response(resp.status, resp.msg, body)
+
+    def get(self, url, headers=None, proxy=None):
+        """GET url asking for a compressed body and follow redirects.
+        proxy overrides supybot's HTTP proxy. Returns a Response. A 304 is
+        returned with an empty body. Anything else that goes wrong raises
+        utils.web.Error, like utils.web.getUrl.
+        """
+
+        started = time.time()
+        try:
+            response = self._get(url, headers, proxy)
+        except utils.web.Error:
+            self._count(url, time.time() - started, error=True)
+            raise
+        self._count(url, time.time() - started, notmodified=(response.status == 304))
+        return response
+
+    def _count(self, url, seconds, error=False, notmodified=False):
+        """Add a fetch of url to the counters of its host/path (the query is left out)."""
+
+        (scheme, netloc, path, query, frag) = urlparse.urlsplit(url)
+        with self._lock:
+            if (netloc, path) not in self.paths:
+                self.paths[(netloc, path)] = PathStats()
+            self.paths[(netloc, path)].add(seconds, error=error, notmodified=notmodified)
+
+    def stats(self):
+        """Return a dict of counters for display. paths is {(host, path): PathStats}."""
+
+        with self._lock:
+            paths = {}
+            for (key, stats) in self.paths.items():  # copies, so they hold still while they're read.
+                paths[key] = PathStats()
+                for attr in PathStats.__slots__:
+                    setattr(paths[key], attr, list(stats.buckets) if attr == 'buckets' else getattr(stats, attr))
+            return {'connects': self.connects, 'reuses': self.reuses, 'paths': paths}
+
+    def _get(self, url, headers, proxy):
+        headers = dict(headers or utils.web.defaultHeaders)
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        try:
+            for redirect in range(5):
+                response = self._request(url, headers, proxy=proxy)
+                location = response.headers.get('Location')
+                if response.status in (301, 302, 303, 307, 308) and location:
+                    url = urlparse.urljoin(url, location)
+                    continue
+                break
+            if response.status >= 400:
+                raise HTTPError(response.status)
+            if response.status != 304:
+                response.body = _decode(response.body, response.headers.get('Content-Encoding'))
+            return response
+        except socket.timeout:
+            raise utils.web.Error(utils.web.TIMED_OUT)
+        except (socket.error, httplib.HTTPException, IOError, zlib.error, ValueError) as e:
+            raise utils.web.Error(utils.web.strError(e))
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,91 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import re
+import bisect
+
+from teamindex import normalize
+
+# position out of a rank like T5 or 12. CUT, WD, - have none.
+RANKREGEX = re.compile(r'^T?(?P<position>\d+)$')
+
+
+class Player(object):
+    """One leaderboard row.
+
+    rank, score and thru are kept as upstream sent them (T5, -3, F or a tee
+    time). thru is None for players who missed the cut. position is the
+    number in rank, None if it has none.
+    """
+
+    __slots__ = ('rank', 'position', 'player', 'score', 'thru')
+
+    def __init__(self, rank, player, score, thru=None):
+        self.rank = rank
+        m = RANKREGEX.match(rank)
+        self.position = int(m.group('position')) if m else None
+        self.player = player
+        self.score = score
+        self.thru = thru
+
+
+class Leaderboard(object):
+    """A parsed golf leaderboard, in leaderboard order.
+
+    Indexed once when built: positions holds the position of every row (rows
+    without one sort last) so top(n) is a bisect, and names maps every word
+    of a player's name (and the whole name) to their rows so find() doesn't
+    scan the field. A word no one has falls back to a scan of the names.
+    note is the text shown instead of a leaderboard (the Ryder Cup).
+    """
+
+    def __init__(self, event, status, players, note=None):
+        self.event = event
+        self.status = status
+        self.note = note
+        self.players = players
+        self.positions = []
+        last = 0
+        for player in players:  # missed the cut, withdrew etc. come after everyone ranked.
+            last = max(last, player.position if player.position is not None else float('inf'))
+            self.positions.append(last)
+        self.names = {}  # normalized name or word of it: [row, ...]
+        self._normalized = []
+        for (i, player) in enumerate(players):
+            name = normalize(player.player)
+            self._normalized.append(name)
+            for word in set(name.split() + [name]):
+                self.names.setdefault(word, []).append(i)
+
+    def top(self, n):
+        """Return the players at position n or better, ties included."""
+
+        return self.players[:bisect.bisect_right(self.positions, n)]
+
+    def find(self, query):
+        """Return the rows (indexes) of the players query names, best first."""
+
+        query = normalize(query)
+        if not query:
+            return []
+        if query in self.names:
+            return self.names[query]
+        words = [set(self.names.get(word, ())) for word in query.split()]
+        if all(words):
+            return sorted(set.intersection(*words))
+        return [i for (i, name) in enumerate(self._normalized) if query in name]
+
+    def around(self, query, spread):
+        """Return (player, players within spread rows of them) for the best
+        placed player query names. (None, []) if there is none.
+        """
+
+        rows = self.find(query)
+        if not rows:
+            return (None, [])
+        i = rows[0]
+        return (self.players[i], self.players[max(0, i - spread):i + spread + 1])
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,135 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import threading
+# supybot libs
+import supybot.httpserver as httpserver
+# plugin libs
+import httpclient
+import sports
+
+
+def _labels(labels):
+    """Format a dict of labels as {k="v",...}, escaped the way Prometheus wants."""
+
+    if not labels:
+        return ''
+    escaped = ['{0}="{1}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for (k, v) in sorted(labels.items())]
+    return '{' + ','.join(escaped) + '}'
+
+
+class _Writer(object):
+    """Builds a Prometheus text-format (0.0.4) page."""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, doc):
+        self.lines.append("# HELP {0} {1}".format(name, doc))
+        self.lines.append("# TYPE {0} {1}".format(name, kind))
+
+    def sample(self, name, value, **labels):
+        self.lines.append("{0}{1} {2}".format(name, _labels(labels), repr(float(value)) if isinstance(value, float) else value))
+
+    def text(self):
+        return ''.join([line + '\n' for line in self.lines])
+
+
+def exposition(plugin):
+    """Return the metrics of plugin in Prometheus text format. Everything
+    comes from the counters the plugin already keeps for the cache and
+    stats commands, read at scrape time.
+    """
+
+    w = _Writer()
+    # upstream fetches, per host/path.
+    http = plugin.http.stats()
+    paths = sorted(http['paths'].items())
+    w.family('scores_upstream_fetches_total', 'counter', "Upstream fetches by host and path.")
+    for ((host, path), stats) in paths:
+        w.sample('scores_upstream_fetches_total', stats.fetches, host=host, path=path)
+    w.family('scores_upstream_errors_total', 'counter', "Upstream fetches that failed.")
+    for ((host, path), stats) in paths:
+        w.sample('scores_upstream_errors_total', stats.errors, host=host, path=path)
+    w.family('scores_upstream_not_modified_total', 'counter', "Upstream fetches answered 304 Not Modified.")
+    for ((host, path), stats) in paths:
+        w.sample('scores_upstream_not_modified_total', stats.notmodified, host=host, path=path)
+    w.family('scores_upstream_fetch_seconds', 'histogram', "Upstream fetch latency.")
+    for ((host, path), stats) in paths:
+        for (bound, count) in zip(httpclient.LATENCYBUCKETS, stats.buckets):
+            w.sample('scores_upstream_fetch_seconds_bucket', count, host=host, path=path, le=bound)
+        w.sample('scores_upstream_fetch_seconds_bucket', stats.fetches, host=host, path=path, le='+Inf')
+        w.sample('scores_upstream_fetch_seconds_sum', stats.seconds, host=host, path=path)
+        w.sample('scores_upstream_fetch_seconds_count', stats.fetches, host=host, path=path)
+    w.family('scores_upstream_circuit_open', 'gauge', "1 while we've stopped asking a host/path that kept failing, 0.5 while probing it.")
+    for ((host, path), (state, failures, left)) in sorted(plugin.breakers.states().items()):
+        w.sample('scores_upstream_circuit_open', {'open': 1, 'probing': 0.5}.get(state, 0), host=host, path=path)
+    w.family('scores_upstream_rejected_total', 'counter', "Fetches answered without going upstream because the circuit was open.")
+    w.sample('scores_upstream_rejected_total', plugin.breakers.rejected)
+    w.family('scores_upstream_connections_total', 'counter', "Connections to upstream hosts, new or reused from the keep-alive pool.")
+    w.sample('scores_upstream_connections_total', http['connects'], reused='false')
+    w.sample('scores_upstream_connections_total', http['reuses'], reused='true')
+    # response cache and single-flight.
+    cache, flight = plugin.responsecache.stats(), plugin.inflight.stats()
+    w.family('scores_cache_lookups_total', 'counter', "Response cache lookups by result.")
+    w.sample('scores_cache_lookups_total', cache['hits'], result='hit')
+    w.sample('scores_cache_lookups_total', cache['misses'], result='miss')
+    w.family('scores_cache_hit_ratio', 'gauge', "Response cache hits over lookups.")
+    w.sample('scores_cache_hit_ratio', cache['hitrate'] / 100.0)
+    w.family('scores_cache_revalidations_total', 'counter', "Expired cache entries refreshed by a 304.")
+    w.sample('scores_cache_revalidations_total', cache['revalidations'])
+    w.family('scores_cache_evictions_total', 'counter', "Response cache entries evicted for size.")
+    w.sample('scores_cache_evictions_total', cache['evictions'])
+    w.family('scores_cache_entries', 'gauge', "Response cache entries.")
+    w.sample('scores_cache_entries', cache['entries'])
+    w.family('scores_cache_bytes', 'gauge', "Response cache size in bytes.")
+    w.sample('scores_cache_bytes', cache['size'])
+    w.family('scores_cache_max_bytes', 'gauge', "Response cache size limit in bytes.")
+    w.sample('scores_cache_max_bytes', cache['maxbytes'])
+    w.family('scores_coalesced_total', 'counter', "Callers that waited on another thread's fetch of the same url.")
+    w.sample('scores_coalesced_total', flight['coalesced'])
+    # command phases (parse time per sport is phase="parse") and replies.
+    summary, sums = plugin.timings.summary(), plugin.timings.sums()
+    w.family('scores_command_phase_seconds', 'summary', "Time commands spent per sport and phase (fetch, parse, teams, format, reply, other, total).")
+    for (sport, phases) in sorted(summary.items()):
+        for (phase, (count, p50, p95, p99)) in sorted(phases.items()):
+            for (quantile, value) in (('0.5', p50), ('0.95', p95), ('0.99', p99)):
+                w.sample('scores_command_phase_seconds', value, sport=sport, phase=phase, quantile=quantile)
+            (count, total) = sums.get((sport, phase), (count, 0.0))
+            w.sample('scores_command_phase_seconds_sum', total, sport=sport, phase=phase)
+            w.sample('scores_command_phase_seconds_count', count, sport=sport, phase=phase)
+    w.family('scores_replies_total', 'counter', "Replies sent by commands per sport. kind is reply or error.")
+    for ((sport, kind), count) in sorted(plugin.timings.replies.items()):
+        w.sample('scores_replies_total', count, sport=sport, kind=kind)
+    w.family('scores_load_seconds', 'gauge', "Time the last (re)load took: importing the modules, starting the plugin and each module imported on first use.")
+    for (part, seconds) in sorted(plugin.loadtimes.items()) + sorted([('import_' + name, seconds) for (name, seconds) in sports.loaded().items()]):
+        w.sample('scores_load_seconds', seconds, part=part)
+    w.family('scores_threads', 'gauge', "Threads alive in the bot.")
+    w.sample('scores_threads', threading.activeCount())
+    return w.text()
+
+
+class MetricsCallback(httpserver.SupyHTTPServerCallback):
+    """Serves exposition() at /scores/metrics for Prometheus to scrape."""
+
+    name = 'Scores metrics'
+    defaultResponse = "Prometheus metrics of the Scores plugin are at /scores/metrics."
+
+    def __init__(self, plugin):
+        httpserver.SupyHTTPServerCallback.__init__(self)
+        self.plugin = plugin
+
+    def doGet(self, handler, path):
+        if path != '/metrics':
+            (status, body, ctype) = (404, self.defaultResponse, 'text/plain; charset=utf-8')
+        else:
+            (status, body, ctype) = (200, exposition(self.plugin), 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', len(body))
+        self.end_headers()
+        self.write(body)
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
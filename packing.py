@@ -0,0 +1,88 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+# supybot libs
+import supybot.ircutils as ircutils
+
+# an IRC line, \r\n included.
+LINELENGTH = 512
+# what goes between items on a line.
+SEPARATOR = ' | '
+
+
+def size(s):
+    """Bytes s takes on the wire. Formatting codes are bytes like any other."""
+
+    return len(s.encode('utf-8')) if isinstance(s, unicode) else len(s)
+
+
+def budget(prefix, target, nick=None):
+    """Bytes left for the text of a PRIVMSG from prefix (the bot's nick!user@host) to target,
+    less nick's 'nick: ' if the reply is prefixed with it.
+    """
+
+    left = LINELENGTH - size(':{0} PRIVMSG {1} :\r\n'.format(prefix, target))
+    if nick:
+        left -= size('{0}: '.format(nick))
+    return left
+
+
+def marker(count):
+    """The bold (N more messages) put after the last line sent when count lines are left."""
+
+    return ircutils.bold('({0} {1})'.format(count, 'more message' if count == 1 else 'more messages'))
+
+
+def pack(items, maxbytes, sep=SEPARATOR, join=True):
+    """Return items, in order, as lines of at most maxbytes bytes.
+
+    With join, each line holds as many items (sep between them) as fit,
+    otherwise one item each. An item that doesn't fit a line on its own
+    is wrapped over as many as it needs, keeping its formatting.
+    """
+
+    lines, line, used = [], [], 0
+    seplength = size(sep)
+    for item in items:
+        length = size(item)
+        if length > maxbytes:  # too long for any line.
+            if line:
+                lines.append(sep.join(line))
+                (line, used) = ([], 0)
+            lines.extend(ircutils.wrap(item, maxbytes))
+            continue
+        if line and join and used + seplength + length <= maxbytes:
+            line.append(item)
+            used += seplength + length
+            continue
+        if line:
+            lines.append(sep.join(line))
+        (line, used) = ([item], length)
+    if line:
+        lines.append(sep.join(line))
+    return lines
+
+
+def paginate(items, maxbytes, instant=1, sep=SEPARATOR, join=True):
+    """Pack items for a reply of which the first instant lines are sent now.
+
+    Returns (now, later): the lines to send and the lines left for more.
+    If any are left, the last line sent ends with their marker(), which
+    the lines were packed to leave room for.
+    """
+
+    lines = pack(items, maxbytes, sep, join)
+    count = len(lines)
+    while count > instant:
+        lines = pack(items, maxbytes - size(' ' + marker(count - instant)), sep, join)
+        if len(lines) <= count:  # the marker fits. more lines could mean a longer count.
+            break
+        count = len(lines)
+    (now, later) = (lines[:instant], lines[instant:])
+    if later:
+        now[-1] = '{0} {1}'.format(now[-1], marker(len(later)))
+    return (now, later)
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
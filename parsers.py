@@ -0,0 +1,32 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+# only imported the first time a page is parsed (see sports.module), so BeautifulSoup isn't loaded with the plugin.
+import re
+from BeautifulSoup import BeautifulSoup, NavigableString, SoupStrainer
+
+# game blocks on a scoreboard page. GAMESTRAINER makes BeautifulSoup only build these.
+GAMEREGEX = re.compile('^game.*?')
+GAMESTRAINER = SoupStrainer('div', attrs={'id': GAMEREGEX})
+
+
+def page(html):
+    """Return the whole page as a BeautifulSoup."""
+
+    return BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
+
+
+def gameblocks(html, whole=False):
+    """Return the game divs of a scoreboard page. Only those are built
+    unless whole (the old parser, which builds the whole page first).
+    """
+
+    if whole:
+        soup = page(html)
+    else:  # everything outside them is thrown away while parsing.
+        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8', parseOnlyThese=GAMESTRAINER)
+    return soup.findAll('div', attrs={'id': GAMEREGEX})
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
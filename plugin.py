@@ -5,22 +5,84 @@
 ###
 
 # my libs
-from BeautifulSoup import BeautifulSoup, NavigableString
 import re
 import datetime
 import sqlite3
 import os.path
+import time
+import threading
 from base64 import b64decode
 # supybot libs
+import supybot.conf as conf
 import supybot.utils as utils
 from supybot.commands import *
 import supybot.plugins as plugins
+import supybot.registry as registry
+import supybot.schedule as schedule
+import supybot.world as world
 import supybot.ircutils as ircutils
+import supybot.ircmsgs as ircmsgs
 import supybot.callbacks as callbacks
+import supybot.httpserver as httpserver
 from supybot.i18n import PluginInternationalization, internationalizeDocstring
+# plugin libs
+import cache
+import httpclient
+import singleflight
+import scoreboard
+import replay
+import timing
+import metrics
+import watch
+import pool
+import teamindex
+import archive
+import packing
+import breaker
+import sports
+import leaderboard
+import draws
+import races
 
 _ = PluginInternationalization('Scores')
 
+# splits the text of a game into score and playoff information.
+EVENTREGEX = re.compile(r'^(?P<score>.*?)(,|$)(.*?\s(?P<poff>G\d.*?$)|$|.*?[A-Za-z0-9]+$)')
+# a YYYYMMDD date in a scoreboard url.
+DATEREGEX = re.compile(r'^\d{8}$')
+# splits a team from _scores into <RZ>/<> prefix, team and (rank) suffix.
+TEAMREGEX = re.compile(r'(?P<pre>\<RZ\>|\<\>)?(?P<team>[A-Z\-&;]+)(?P<rank>\(\d+\))?')
+
+# boards the background refresher keeps warm, [top25, widest] per sport (see sports.Sport).
+REFRESHBOARDS = dict([(name, sport.boards) for (name, sport) in sports.SPORTS.items()])
+# how often (seconds) the refresher checks which boards are due.
+REFRESHTICK = 15
+# sports that can be watched (cfb is ncf) and the names of what changed in their announcements.
+WATCHSPORTS = {'nba': 'nba', 'wnba': 'wnba', 'nhl': 'nhl', 'mlb': 'mlb', 'nfl': 'nfl', 'cfb': 'ncf', 'ncf': 'ncf', 'ncb': 'ncb', 'ncw': 'ncw'}
+WATCHCHANGES = {'start': 'start', 'score': 'score', 'period': 'period', 'redzone': 'red zone', 'final': 'final'}
+# sports in the scores overview, in order. they're labeled with sports.Sport.label.
+OVERVIEWSPORTS = ('nba', 'nhl', 'mlb', 'nfl', 'ncf', 'ncb', 'ncw', 'wnba')
+# seconds __init__.py took to (re)load our modules. it sets this after loading us.
+MODULESECONDS = 0.0
+# commands timed by phase for the stats command.
+TIMEDCOMMANDS = ('nba', 'wnba', 'nhl', 'mlb', 'nfl', 'cfb', 'ncb', 'ncw', 'tennis', 'golf', 'nascar', 'racing', 'd1bb', 'cfl', 'scores')
+
+# status: (short status, color) for _colorformatstatus.
+STATUSES = {# Red
+            'Final': ('F', 'red'), 'F/OT': ('F/OT', 'red'), 'F/2OT': ('F/2OT', 'red'),
+            'F/3OT': ('F/3OT', 'red'), 'F/4OT': ('F/4OT', 'red'), 'F/5OT': ('F/5OT', 'red'),
+            'Canc': ('CAN', 'red'), 'F/SO': ('F/SO', 'red'),
+            # Green
+            '1st': ('1st', 'green'), '2nd': ('2nd', 'green'), '3rd': ('3rd', 'green'),
+            '4th': ('4th', 'green'), 'OT': ('OT', 'green'), 'SO': ('SO', 'green'),
+            # Yellow
+            'Half': ('H', 'yellow'), 'Dly': ('DLY', 'yellow'), 'DLY': ('DLY', 'yellow'),
+            'PPD': ('PPD', 'yellow'), 'Del:': ('DLY', 'yellow'), 'Int': ('INT', 'yellow'),
+            'Del': ('DLY', 'yellow')}
+# built once. True is the colored variant, False the plain one (disableANSI).
+STATUSTABLES = {True: dict([(k, ircutils.mircColor(v, c)) for (k, (v, c)) in STATUSES.items()]),
+                False: dict([(k, v) for (k, (v, c)) in STATUSES.items()])}
+
 
 @internationalizeDocstring
 class Scores(callbacks.Plugin):
@@ -29,10 +91,79 @@ class Scores(callbacks.Plugin):
     threaded = True
 
     def __init__(self, irc):
+        started = time.time()
         self.__parent = super(Scores, self)
         self.__parent.__init__(irc)
         self.scoresdb = os.path.abspath(os.path.dirname(__file__)) + '/db/scores.db'
         self.WEEKDAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+        # every upstream fetch goes through here. keyed by full url.
+        self.responsecache = cache.ResponseCache(self.registryValue('cache.maxBytes'))
+        # concurrent fetches/parses of the same url share a single call.
+        self.inflight = singleflight.SingleFlight()
+        # pooled keep-alive connections to upstream hosts.
+        self.http = httpclient.HTTPClient(self.registryValue('http.poolSize'), self.registryValue('http.connectTimeout'), self.registryValue('http.readTimeout'))
+        # stop asking upstream hosts/paths that keep failing for a while.
+        self.breakers = breaker.Breakers(self.registryValue('breaker.threshold'), self.registryValue('breaker.backoff'), self.registryValue('breaker.maxBackoff'))
+        self.recorder = None  # replay.Store while record.enabled.
+        # rolling per sport/phase timings of commands for stats.
+        self.timings = timing.Timings()
+        # full team names, loaded once from the db. {sport: {short: full}}
+        self.teams, self.missingteams = {}, {}
+        self._loadteams()
+        # parsed scoreboards, keyed by url. the refresher keeps some warm.
+        self.boards = cache.BoardCache(64)
+        self.refreshstate, self.refreshday = {}, None
+        self.refreshlock = threading.Lock()
+        schedule.addPeriodicEvent(self._refreshtick, REFRESHTICK, name='scoresrefresh', now=False)
+        # team watches per channel. one poll of a board serves every channel/team watching it.
+        self.watchlist = watch.Watches(conf.supybot.directories.data.dirize('ScoresWatches.json'))
+        self.watchboards, self.watchnext, self.watchbusy = {}, 0, False
+        self.watchlock = threading.Lock()
+        schedule.addPeriodicEvent(self._watchtick, REFRESHTICK, name='scoreswatch', now=False)
+        # position snapshots of the races we've seen, polled while live if races.enabled.
+        self.races = races.Tracker(self.registryValue('races.snapshots'))
+        self.racenext, self.racebusy = {}, False
+        self.racelock = threading.Lock()
+        schedule.addPeriodicEvent(self._racetick, REFRESHTICK, name='scoresraces', now=False)
+        # final scores, so past dates are answered without going upstream.
+        self.archive = None
+        if self.registryValue('archive.enabled'):
+            self.archive = archive.Archive(conf.supybot.directories.data.dirize('ScoresArchive.db'))
+            schedule.addPeriodicEvent(self.archive.flush, 60, name='scoresarchive', now=False)
+        # bounded pool for commands that fetch several boards at once.
+        self.pool = pool.Pool(self.registryValue('http.fetchers'), name='Scores fetcher')
+        # the scores command's own, so it never queues behind ranges or tennis all.
+        self.overviewpool = pool.Pool(self.registryValue('overview.poolSize'), name='Scores overview')
+        # prometheus metrics at /scores/metrics on supybot's http server.
+        self.metricshooked = self.registryValue('metrics.enabled')
+        if self.metricshooked:
+            httpserver.hook('scores', metrics.MetricsCallback(self))
+        # how long (re)loading took: importing the modules (see __init__.py) and starting up here.
+        self.loadtimes = {'modules': MODULESECONDS, 'init': time.time() - started}
+        self.log.info("Scores :: Loaded in {0:.0f}ms (modules {1:.0f}ms, init {2:.0f}ms)".format(sum(self.loadtimes.values()) * 1000, MODULESECONDS * 1000, self.loadtimes['init'] * 1000))
+
+    def callCommand(self, command, irc, msg, *args, **kwargs):
+        """Time the sport commands by phase (fetch/parse/teams/format/reply)."""
+
+        if command[-1] not in TIMEDCOMMANDS:
+            return self.__parent.callCommand(command, irc, msg, *args, **kwargs)
+        with self.timings.timer(command[-1]):
+            self.__parent.callCommand(command, timing.TimedIrc(irc, self.timings), msg, *args, **kwargs)
+
+    def die(self):
+        for name in ('scoresrefresh', 'scoreswatch', 'scoresraces', 'scoresarchive'):
+            try:
+                schedule.removePeriodicEvent(name)
+            except KeyError:  # already gone.
+                pass
+        if self.metricshooked:
+            httpserver.unhook('scores')
+        self.pool.close()
+        self.overviewpool.close()
+        if self.archive:
+            self.archive.close()
+        self.http.close()
+        self.__parent.die()
 
     ##############
     # FORMATTING #
@@ -70,22 +201,35 @@ class Scores(callbacks.Plugin):
     # PROCESSING #
     ##############
 
-    def _splicegen(self, maxchars, stringlist):
-        """Return a group of splices from a list based on the maxchars
-        string-length boundary.
+    def _replylines(self, irc, msg, items):
+        """Reply with items packed into as few IRC lines as fit, one item per line with lineByLineScores.
+
+        Lines are measured in bytes against what's left of the 512 once our
+        prefix, the target and the nick prefix are in. The first
+        supybot.reply.mores.instant lines are sent and the rest wait for more.
         """
 
-        runningcount = 0
-        tmpslice = []
-        for i, item in enumerate(stringlist):
-            runningcount += len(item)
-            if runningcount <= int(maxchars):
-                tmpslice.append(i)
-            else:
-                yield tmpslice
-                tmpslice = [i]
-                runningcount = len(item)
-        yield(tmpslice)
+        if not items:
+            return
+        if not getattr(irc, 'finalEvaled', True):  # nested. the outer command gets it all at once.
+            irc.reply(packing.SEPARATOR.join(items))
+            return
+        target = msg.channel or msg.nick
+        maxbytes = conf.get(conf.supybot.reply.mores.length, channel=target, network=irc.network)
+        if not maxbytes:  # 0 is as much as fits.
+            maxbytes = packing.budget(irc.prefix, target, msg.nick if getattr(irc, 'prefixNick', True) else None)  # like limnoria, in private too.
+        if conf.get(conf.supybot.reply.mores, channel=target, network=irc.network):
+            instant = max(1, conf.get(conf.supybot.reply.mores.instant, channel=target, network=irc.network))
+        else:  # no mores. everything now.
+            instant = len(items) + 1
+        join = not self.registryValue('lineByLineScores', msg.args[0])
+        (now, later) = packing.paginate(items, maxbytes, instant=instant, join=join)
+        for line in now:
+            irc.reply(line)
+        if later:  # where the more command looks. it pops from the end.
+            later.reverse()
+            irc._mores[msg.prefix.split('!', 1)[1]] = later
+            irc._mores[msg.nick] = (not msg.channel, later)
 
     def _validate(self, date, format):
         """Return true or false for valid date based on format."""
@@ -100,8 +244,7 @@ class Scores(callbacks.Plugin):
         """Input event string and we return score and playoff information in dict."""
 
         #scoreregex = re.compile(r'^(?P<score>.*?),(.*?\s(?P<poff>G\d:.*?$)|$|.*?[A-Za-z0-9]+$)')
-        scoreregex = re.compile(r'^(?P<score>.*?)(,|$)(.*?\s(?P<poff>G\d.*?$)|$|.*?[A-Za-z0-9]+$)')
-        s = scoreregex.search(event)  # have regex and fallback split method.
+        s = EVENTREGEX.search(event)  # have regex and fallback split method.
         if s:  # if we match.
             eventstr = {'score': s.groupdict()['score'], 'poff': s.groupdict()['poff']}
         else:  # regex broke. log the "error" so we can fix.
@@ -110,10 +253,12 @@ class Scores(callbacks.Plugin):
         # return our gamestr.
         return eventstr
 
-    def _boldleader(self, atm, asc, htm, hsc):
+    def _boldleader(self, atm, asc, htm, hsc, ansi=True):
         """Input away team, away score, home team, home score and bold the leader of the two."""
 
-        if int(asc) > int(hsc):  # away winning.
+        if not ansi:  # nothing to bold.
+            return("{0} {1} {2} {3}".format(atm, asc, htm, hsc))
+        elif int(asc) > int(hsc):  # away winning.
             #self.log.info("HOME: {0} {1} {2} {3}".format(atm, asc, htm, hsc))
             #return("{0} {1} {2} {3}".format(self._bu(atm), self._bu(asc), htm, hsc))
             return("{0} {1}".format(self._bold(atm + " " + asc), self._sf(htm + " " + hsc)))
@@ -124,35 +269,21 @@ class Scores(callbacks.Plugin):
         else:  # tied.
             return("{0} {1} {2} {3}".format(atm, asc, htm, hsc))
 
-    def _colorformatstatus(self, string):
+    def _colorformatstatus(self, string, ansi=True):
         """Handle the formatting of a status with color."""
 
-        table = {# Red
-                 'Final':self._red('F'),'F/OT':self._red('F/OT'),'F/2OT':self._red('F/2OT'),
-                 'F/3OT':self._red('F/3OT'),'F/4OT':self._red('F/4OT'),'F/5OT':self._red('F/5OT'),
-                 'Canc':self._red('CAN'),'F/SO':self._red('F/SO'),
-                 # Green
-                 '1st':self._green('1st'),'2nd':self._green('2nd'),'3rd':self._green('3rd'),
-                 '4th':self._green('4th'),'OT':self._green('OT'),'SO':self._green('SO'),
-                 # Yellow
-                 'Half':self._yellow('H'),'Dly':self._yellow('DLY'),'DLY':self._yellow('DLY'),
-                 'PPD':self._yellow('PPD'),'Del:':self._yellow('DLY'),'Int':self._yellow('INT'),
-                 'Del':self._yellow('DLY')
-                 }
-        try:  # try to colorize.
-            return table[string]
-        except:  # return if error.
-            return string
+        return STATUSTABLES[ansi].get(string, string)
 
-    def _mlbformatstatus(self, string):
+    def _mlbformatstatus(self, string, ansi=True):
         """Handle MLB specific status here."""
 
+        color = None
         # conditionals for each.
         if string.startswith('F'):  # Final or F/10. Game is complete.
             string = string.replace('FINAL', 'F')  # FINAL to F.
             string = string.replace('Final', 'F')  # Final to F.
             string = string.replace(' ', '')  # Remove spaces (d1bb).
-            string = self._red(string)
+            color = 'red'
         # Top/Bot/End/Mid (Game Going on)
         elif string.startswith('Top ') or string.startswith('Bot ') or string.startswith('End') or string.startswith('Mid') or string.startswith('Bottom '):
             string = string.replace('Top ', 'T')  # Top to T.
@@ -161,113 +292,368 @@ class Scores(callbacks.Plugin):
             string = string.replace('End ', 'E')  # End to E.
             string = string.replace('Mid ', 'M')  # Mid to M.
             string = string.replace('th', '').replace('nd', '').replace('rd', '').replace('st', '')  # remove endings.
-            string = self._green(string)
+            color = 'green'
         # Delayed/PPD/Susp s tuff.
         elif string.startswith('Dly') or string.startswith('PPD') or string.startswith('Del') or string.startswith('Susp'):  # delayed
-            if string == "PPD":  # PPD is one thing, otherwise..
-                string = self._yellow('PPD')
-            else:  # it can be "DLY: End 5th." or "Susp: Bot 9th". I don't want to do conditionals here.
-                string = self._yellow('DLY')
+            if string != "PPD":  # it can be "DLY: End 5th." or "Susp: Bot 9th". I don't want to do conditionals here.
+                string = 'DLY'
+            color = 'yellow'
         # return now.
+        if color and ansi:
+            string = ircutils.mircColor(string, color)
         return string
 
-    def _handlestatus(self, sport, string):
+    def _handlestatus(self, sport, string, ansi=True):
         """Handle working with the time/status of a game."""
 
         if sport == 'mlb':  # handle mlb here.
-            string = self._mlbformatstatus(string)
+            string = self._mlbformatstatus(string, ansi=ansi)
             return string
         else:  # everything else.
             strings = string.split(' ', 1)  # split at space, everything in a list w/two.
             if len(strings) == 2:  # if we have two items, like 3:00 4th.
                 # this is a special case for NFL/CFB where they do [u'Del:', u'10:30 1st']
                 if strings[0] == "Del:":  # special case for Delay.
-                    return "{0} ({1})".format(self._yellow("DLY"), strings[1])
+                    return "{0} ({1})".format(self._colorformatstatus("Dly", ansi=ansi), strings[1])
                 else:  # basically, everything else.
-                    return "{0} {1}".format(strings[0], self._colorformatstatus(strings[1]))  # ignore time and colorize quarter/etc.
+                    return "{0} {1}".format(strings[0], self._colorformatstatus(strings[1], ansi=ansi))  # ignore time and colorize quarter/etc.
             else:  # game is "not in progress"
-                return self._colorformatstatus(strings[0])  # just return the colorized quarter/etc due to no time.
+                return self._colorformatstatus(strings[0], ansi=ansi)  # just return the colorized quarter/etc due to no time.
+
+    def _cachettl(self, sport):
+        """Return the response cache TTL for sport."""
+
+        try:
+            return self.registryValue('cache.ttl.%s' % sport)
+        except registry.NonExistentRegistryEntry:  # no sport specific ttl.
+            return self.registryValue('cache.ttl.default')
+
+    def _geturl(self, url, sport, headers=None, logurl=False, force=False):
+        """Fetch url through the response cache and return the page.
+        Use force to skip the cached copy. Raises utils.web.Error if we
+        have to go upstream and that fails.
+        """
 
-    def _fetch(self, optargs, logurl=False):
+        with self.timings.phase('fetch'):
+            page = None if force else self.responsecache.get(url)
+            if page is None:  # not cached or expired. go upstream, once, no matter how many threads want it.
+                page = self.inflight.do(('fetch', url), self._upstream, url, sport, headers=headers, logurl=logurl)
+        return page
+
+    def _upstream(self, url, sport, headers=None, logurl=False):
+        """Fetch url from upstream into the response cache and return the page.
+        Only one thread runs this per url at a time (see _geturl).
+        """
+
+        if logurl or self.registryValue('logURLs'):
+            self.log.info("Trying to fetch: {0}".format(url))
+        # if we still hold an expired copy, ask upstream if it changed.
+        (etag, lastmodified) = self.responsecache.validators(url)
+        reqheaders = dict(headers or utils.web.defaultHeaders)
+        if etag:
+            reqheaders['If-None-Match'] = etag
+        if lastmodified:
+            reqheaders['If-Modified-Since'] = lastmodified
+        self.http.configure(self.registryValue('http.poolSize'), self.registryValue('http.connectTimeout'), self.registryValue('http.readTimeout'))
+        proxy = self.registryValue('http.proxy')
+        # don't wait out another timeout on a host/path that keeps failing. raises breaker.CircuitOpen.
+        self.breakers.configure(self.registryValue('breaker.threshold'), self.registryValue('breaker.backoff'), self.registryValue('breaker.maxBackoff'))
+        self.breakers.allow(url)
+        response = self._upstreamget(url, reqheaders, proxy)
+        # upstream's max-age wins over ours if we're told to honor it.
+        ttl = self._cachettl(sport)
+        if self.registryValue('cache.honorMaxAge'):
+            maxage = httpclient.maxage(response.headers)
+            if maxage is not None:
+                ttl = maxage
+        self.responsecache.resize(self.registryValue('cache.maxBytes'))
+        page = None
+        if response.status == 304:  # not modified. same body means _board skips the parse too.
+            page = self.responsecache.revalidate(url, ttl)
+            if page is None:  # evicted while we were asking. fetch it whole.
+                response = self._upstreamget(url, headers, proxy)
+        if page is None:
+            page = response.body
+            self.responsecache.set(url, page, ttl, etag=response.headers.get('ETag'), lastmodified=response.headers.get('Last-Modified'))
+        if self.registryValue('record.enabled'):
+            self._record(url, page)
+        return page
+
+    def _upstreamget(self, url, headers, proxy):
+        """http.get url, counting how it went against its circuit breaker."""
+
+        try:
+            response = self.http.get(url, headers=headers, proxy=proxy)
+        except Exception as e:
+            if breaker.transient(e) and self.breakers.failure(url):
+                self.log.warning("_upstream :: Too many failures fetching {0}. Not trying again for a while.".format(url))
+            raise
+        self.breakers.success(url)
+        return response
+
+    def _record(self, url, page):
+        """Save page to the recording in record.directory (see replay.py)."""
+
+        path = self.registryValue('record.directory') or conf.supybot.directories.data.dirize('ScoresRecordings')
+        try:
+            if not self.recorder or self.recorder.path != path:
+                self.recorder = replay.Store(path)
+            self.recorder.put(url, page)
+        except (IOError, OSError) as e:  # never fail a command over this.
+            self.log.error("_record :: Could not record {0}: {1}".format(url, e))
+
+    def _fetch(self, optargs, logurl=False, sport=None, force=False):
         """Fetch and return HTML."""
 
         url = b64decode('aHR0cDovL20uZXNwbi5nby5jb20v') + '%s&wjb=' % optargs
         try:
-            if logurl or self.registryValue('logURLs'):
-                self.log.info("Trying to fetch: {0}".format(url))
-
             headers = {"User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:17.0) Gecko/17.0 Firefox/17.0"}
-            page = utils.web.getUrl(url, headers=headers)
+            page = self._geturl(url, sport or 'default', headers=headers, logurl=logurl, force=force)
             return page
         except utils.web.Error as e:
             self.log.error("ERROR. Could not open {0} message: {1}".format(url, e))
             return None
 
-    def _scores(self, html, sport="", fullteams=True, showlater=True):
-        """Go through each "game" we receive and process the data."""
+    def _parsegames(self, html, sport=""):
+        """Parse a scoreboard page into a list of scoreboard.Game records."""
 
-        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
-        games = soup.findAll('div', attrs={'id': re.compile('^game.*?')})
+        # the old parser (soup) builds the whole page. the default only builds the game blocks.
+        games = sports.module('parsers').gameblocks(html, whole=self.registryValue('parser') == 'soup')
         # setup the list for output.
-        gameslist = []
+        parsed = []
         # go through each game
         for game in games:
             gamestr = self._splitevent(game.getText())  # convert to text.
             gametext = gamestr['score']  # returns a dict with score and poff.
+            redzone = False
             if " at " not in gametext:  # game is in-action.
                 if sport == 'nfl' or sport == 'ncf':  # special for NFL/NCB to display POS.
-                    if game.find('b', attrs={'class': 'red'}):
-                        gametext = gametext.replace('*', '<RZ>')
-                    else:
-                        gametext = gametext.replace('*', '<>')
-                # make sure we split into parts and shove whatever status/time is in the rest.
-                gparts = gametext.split(" ", 4)
-                # replace & in team's.
-                gparts[0] = gparts[0].replace('&amp;', '&')
-                gparts[2] = gparts[2].replace('&amp;', '&')
-                if fullteams:  # gparts[0] = away/2=home. full translation table.
+                    redzone = bool(game.find('b', attrs={'class': 'red'}))
+            record = scoreboard.parsegame(gametext, gamestr['poff'], redzone=redzone, gameid=game.get('id'))
+            if not record:  # log so we can fix.
+                self.log.info("_parsegames :: Could not parse game '{0}' for {1}".format(gametext, sport))
+                continue
+            parsed.append(record)
+        # return the parsed games.
+        return parsed
+
+    def _board(self, url, sport, force=False):
+        """Return the cache.Board for a scoreboard url or None if we cannot fetch it.
+        Boards kept warm by the refresher are returned without fetching. Otherwise,
+        we only re-parse if the page changed since we last parsed it.
+        """
+
+        board = self.boards.get(url)
+        if board and not force and board.expires > time.time():  # warm.
+            return board
+        # everyone asking for this board right now shares one fetch and parse.
+        return self.inflight.do(('board', url), self._loadboard, url, sport, force=force)
+
+    def _loadboard(self, url, sport, force=False):
+        """Fetch and parse a scoreboard for _board."""
+
+        if self.archive and not force:  # past dates we hold whole never go upstream.
+            board = self._archivedboard(url)
+            if board:
+                self.boards.set(url, board)
+                return board
+        board = self.boards.get(url)
+        html = self._fetch(url, sport=sport, force=force)
+        if not html:  # upstream is down. the last board we had beats nothing.
+            if board:
+                board.stale = True
+            return board
+        if board and (board.html is html or board.html == html):  # same page. skip the parse.
+            (board.stale, board.fetched) = (False, time.time())
+            return board
+        with self.timings.phase('parse'):
+            board = cache.Board(html, self._parsegames(html, sport=sport))
+        if not board.games:  # no games. that won't change for a while, so don't ask again until then.
+            board.expires = time.time() + self.registryValue('cache.emptyTTL')
+        self.boards.set(url, board)
+        if self.archive:
+            self._archiveboard(url, sport, board)
+        return board
+
+    def _archivekey(self, url):
+        """Return (key, date) for a scoreboard url. date is YYYYMMDD or None for today's board.
+        key is the url with its query in a fixed order so a board has one key however it was asked for.
+        """
+
+        (path, query) = (url.split('?', 1) + [''])[0:2]
+        params = [p for p in query.split('&') if p]
+        dates = [p[5:] for p in params if p.startswith('date=')]
+        date = dates[-1] if dates and DATEREGEX.match(dates[-1]) else None
+        key = "{0}?{1}".format(path, "&".join(sorted([p for p in params if not p.startswith('date=')]) + ['date={0}'.format(date or 'today')]))
+        return (key, date)
+
+    def _archivedboard(self, url):
+        """Return the archived cache.Board of a past date's url or None."""
+
+        (key, date) = self._archivekey(url)
+        if not date:
+            return None
+        games = self.archive.getboard(key)
+        if games is None:
+            return None
+        # it never changes, so it's always warm.
+        return cache.Board(None, [scoreboard.Game(*game) for game in games], expires=float('inf'))
+
+    def _archiveboard(self, url, sport, board):
+        """Queue the final games of board for the archive. A past date's board is
+        kept whole once every game on it is final or never going to be played.
+        """
+
+        (key, date) = self._archivekey(url)
+        today = datetime.date.today().strftime('%Y%m%d')
+        for game in board.games:
+            if game.state == 'post':
+                self.archive.add(sport, date or today, game.away, game.home, game.awayscore, game.homescore, game.status, game.awayabbr, game.homeabbr)
+        settled = [g for g in board.games if g.state == 'post' or (g.state == 'pre' and 'AM' not in g.status and 'PM' not in g.status)]
+        if date and date < today and board.games and len(settled) == len(board.games):
+            self.archive.putboard(key, sport, date, [(g.state, g.away, g.home, g.awayscore, g.homescore, g.status, g.poff) for g in board.games])
+
+    def _scores(self, html, sport="", fullteams=True, showlater=True):
+        """Go through each "game" we receive and process the data."""
+
+        return self._formatgames(self._parsegames(html, sport=sport), sport=sport, fullteams=fullteams, showlater=showlater)
+
+    def _formatgames(self, games, sport="", fullteams=True, showlater=True, ansi=True):
+        """Render a list of scoreboard.Game records into a list of strings."""
+
+        # setup the list for output.
+        gameslist = []
+        # go through each game
+        for game in games:
+            if game.state == 'pre' and not showlater:  # don't show these if !
+                break
+            gameslist.append(self._rendergame(game, sport=sport, fullteams=fullteams, ansi=ansi))
+        # return the list of games.
+        return gameslist
+
+    def _renderboard(self, board, sport="", fullteams=True, showlater=True, ansi=True):
+        """Like _formatgames for a cache.Board. Each (sport, fullteams, ansi)
+        variant is rendered once per board and reused until the board changes.
+        """
+
+        variant = (sport, fullteams, ansi)
+        gameslist = board.rendered.get(variant)
+        if gameslist is None:
+            with self.timings.phase('format'):
+                gameslist = board.rendered[variant] = self._formatgames(board.games, sport=sport, fullteams=fullteams, ansi=ansi)
+        if not showlater:  # stop at the first game that hasn't started.
+            for (i, game) in enumerate(board.games):
+                if game.state == 'pre':
+                    gameslist = gameslist[:i]
+                    break
+        if board.stale:  # say how old it is after the games.
+            gameslist = gameslist + [self._stalenote(board)]
+        return gameslist
+
+    def _stalenote(self, board):
+        """What we put after the games of a board upstream failed to refresh."""
+
+        return "(stale: fetched {0}m ago, upstream is not answering)".format(int(time.time() - board.fetched) // 60)
+
+    def _rendergame(self, game, sport="", fullteams=True, ansi=True):
+        """Render a single scoreboard.Game for output."""
+
+        if game.state != 'pre':  # game is in-action.
+            gparts = [game.away, game.awayscore, game.home, game.homescore, game.status]
+            if sport == 'nfl' or sport == 'ncf':  # special for NFL/NCF to display POS.
+                marker = '<RZ>' if game.redzone else '<>'
+                gparts = [part.replace('*', marker) for part in gparts]
+            if fullteams:  # gparts[0] = away/2=home. full translation table.
+                with self.timings.phase('teams'):
                     gparts[0] = self._transteam(gparts[0], optsport=sport)
                     gparts[2] = self._transteam(gparts[2], optsport=sport)
-                # last exception: color <RZ> or * if we have them.
-                if sport == 'nfl' or sport == 'ncf':  # cheap but works.
-                    gparts[0] = gparts[0].replace('<RZ>', self._red('<RZ>')).replace('<>', self._red('<>'))
-                    gparts[2] = gparts[2].replace('<RZ>', self._red('<RZ>')).replace('<>', self._red('<>'))
-                # now bold the leader and format output.
-                gamescore = self._boldleader(gparts[0], gparts[1], gparts[2], gparts[3])
-                # remove if we have a , split and use [0]
-                gparts[4] = gparts[4].split(',')[0]
-                # prepare to output. if we are in a "playoffs" situation (NHL/NBA/MLB)
-                if gamestr['poff']:
-                    output = "{0} {1} ({2})".format(gamescore, self._handlestatus(sport, gparts[4]), gamestr['poff'])
-                else:  # regular, non-playoffs, like all other sports.
-                    output = "{0} {1}".format(gamescore, self._handlestatus(sport, gparts[4]))
-            else:  # TEAM at TEAM time for inactive games.
-                if not showlater:  # don't show these if !
-                    break
-                gparts = gametext.split(" ", 3)  # remove AM/PM in split.
-                #self.log.info("{0}".format(gparts))
-                # replace & in team's.
-                gparts[0] = gparts[0].replace('&amp;', '&')
-                gparts[2] = gparts[2].replace('&amp;', '&')
-                # should we do full team names?
-                if fullteams:  # full teams.
+            # last exception: color <RZ> or * if we have them.
+            if ansi and (sport == 'nfl' or sport == 'ncf'):  # cheap but works.
+                gparts[0] = gparts[0].replace('<RZ>', self._red('<RZ>')).replace('<>', self._red('<>'))
+                gparts[2] = gparts[2].replace('<RZ>', self._red('<RZ>')).replace('<>', self._red('<>'))
+            # now bold the leader and format output.
+            gamescore = self._boldleader(gparts[0], gparts[1], gparts[2], gparts[3], ansi=ansi)
+            # prepare to output. if we are in a "playoffs" situation (NHL/NBA/MLB)
+            if game.poff:
+                output = "{0} {1} ({2})".format(gamescore, self._handlestatus(sport, gparts[4], ansi=ansi), game.poff)
+            else:  # regular, non-playoffs, like all other sports.
+                output = "{0} {1}".format(gamescore, self._handlestatus(sport, gparts[4], ansi=ansi))
+        else:  # TEAM at TEAM time for inactive games.
+            gparts = [game.away, 'at', game.home, game.status]
+            # should we do full team names?
+            if fullteams:  # full teams.
+                with self.timings.phase('teams'):
                     gparts[0] = self._transteam(gparts[0], optsport=sport)
                     gparts[2] = self._transteam(gparts[2], optsport=sport)
-                # for PPD in something not started.
-                if "AM" not in gparts[3] and "PM" not in gparts[3]:
-                    gparts[3] = self._colorformatstatus(gparts[3])
-                else:  # lets clean up what's left here.
-                    gparts[3] = gparts[3].split(',')[0]  # remove if we have a , split and use [0]
-                    gparts[3] = gparts[3].replace('PM', '').replace('AM', '').strip()  # remove AM+PM+tailing space.
-                # now prepare to output. if we're in playoffs situation (NHL/NBA/MLB)
-                if gamestr['poff']:
-                    output = "{0} at {1} {2} ({3})".format(gparts[0], gparts[2], gparts[3], gamestr['poff'])
-                else: # regular, non-playoffs, like all other sports.
-                    output = "{0} at {1} {2}".format(gparts[0], gparts[2], gparts[3])
-            # finally add whatever output is.
-            gameslist.append(output)
-        # return the list of games.
-        return gameslist
+            # for PPD in something not started.
+            if "AM" not in gparts[3] and "PM" not in gparts[3]:
+                gparts[3] = self._colorformatstatus(gparts[3], ansi=ansi)
+            else:  # lets clean up what's left here.
+                gparts[3] = gparts[3].split(',')[0]  # remove if we have a , split and use [0]
+                gparts[3] = gparts[3].replace('PM', '').replace('AM', '').strip()  # remove AM+PM+tailing space.
+            # now prepare to output. if we're in playoffs situation (NHL/NBA/MLB)
+            if game.poff:
+                output = "{0} at {1} {2} ({3})".format(gparts[0], gparts[2], gparts[3], game.poff)
+            else: # regular, non-playoffs, like all other sports.
+                output = "{0} at {1} {2}".format(gparts[0], gparts[2], gparts[3])
+        # finally return whatever output is.
+        return output
+
+    #############
+    # REFRESHER #
+    #############
+
+    def _refreshtick(self):
+        """Scheduled every REFRESHTICK seconds. Starts a refresh of the boards that are due."""
+
+        if not self.registryValue('refresh.enabled'):
+            return
+        now, today = time.time(), datetime.date.today()
+        with self.refreshlock:
+            if today != self.refreshday:  # date rolled over. pre-warm every sport for the new day.
+                self.refreshday = today
+                self.refreshstate = dict([(sport, now) for sport in self.registryValue('refresh.sports') if sport in REFRESHBOARDS])
+            # None means a sport has no games today. we leave those alone until tomorrow.
+            due = [sport for (sport, nexttime) in self.refreshstate.items() if nexttime is not None and nexttime <= now]
+            if not due:
+                return
+            for sport in due:  # so the next tick doesn't pick these up while we're working.
+                self.refreshstate[sport] = now + REFRESHTICK * 4
+        # fetch in the background so we don't block the bot.
+        t = threading.Thread(target=self._refreshboards, args=(due,), name='Thread #%s (Scores refresher)' % world.threadsSpawned)
+        world.threadsSpawned += 1
+        t.setDaemon(True)
+        t.start()
+
+    def _refreshboards(self, sports):
+        """Refresh the boards for sports and work out when each is due next."""
+
+        for sport in sports:
+            states, failed = set(), False
+            for url in REFRESHBOARDS[sport]:
+                board = self._board(url, sport, force=True)
+                if board is None:
+                    failed = True
+                    continue
+                states.update([game.state for game in board.games])
+            # poll fast while live, slow when everything is scheduled/final, and stop on no games.
+            if failed or 'in' in states:
+                interval = self.registryValue('refresh.liveInterval')
+            elif states:
+                interval = self.registryValue('refresh.idleInterval')
+            else:
+                interval = None
+            now = time.time()
+            if interval:  # boards stay warm until just after the next refresh.
+                for url in REFRESHBOARDS[sport]:
+                    board = self.boards.get(url)
+                    # a scheduled game can start before an idle refresh. those boards keep their cache.ttl.
+                    if board and ('in' in states or failed or not [game for game in board.games if game.state == 'pre']):
+                        board.expires = now + interval + REFRESHTICK
+            with self.refreshlock:
+                if sport in self.refreshstate:
+                    self.refreshstate[sport] = (now + interval) if interval else None
+            self.log.debug("_refreshboards :: {0} states {1} next refresh in {2}".format(sport, list(states), interval))
 
     def _datetodatetime(self, optdate):
         """Convert a string like yesterday to datetime object and return YYYYMMDD string."""
@@ -319,28 +705,174 @@ class Scores(callbacks.Plugin):
         # return it.
         return kickoff
 
+    def _rangeargs(self, optlist, optinput):
+        """Return ([YYYYMMDD, ...], team) if --from/--to or week [team] ask for a range of days, else None.
+        Raises ValueError with what's wrong with the range.
+        """
+
+        opts = dict(optlist or [])
+        words = (optinput or '').split(None, 1)
+        today = datetime.date.today()
+        if words and words[0].lower() == 'week':  # the last seven days.
+            (start, end, team) = (today - datetime.timedelta(days=6), today, words[1] if len(words) > 1 else None)
+        elif 'from' in opts or 'to' in opts:
+            for key in ('from', 'to'):
+                if key in opts and (len(str(opts[key])) != 8 or not self._validate(opts[key], '%Y%m%d')):
+                    raise ValueError("Invalid --{0} date. Must be YYYYmmdd. Ex: --{0} 20120904".format(key))
+            end = datetime.datetime.strptime(str(opts['to']), '%Y%m%d').date() if 'to' in opts else today
+            start = datetime.datetime.strptime(str(opts['from']), '%Y%m%d').date() if 'from' in opts else end - datetime.timedelta(days=6)
+            team = optinput
+        else:
+            return None
+        if end < start:
+            raise ValueError("--to is before --from.")
+        maxdays = self.registryValue('range.maxDays')
+        if (end - start).days >= maxdays:
+            raise ValueError("At most {0} days at a time.".format(maxdays))
+        return ([(start + datetime.timedelta(days=i)).strftime('%Y%m%d') for i in range((end - start).days + 1)], team)
+
+    def _rangereply(self, irc, msg, sport, url, dates, team=None):
+        """Reply with the games of url (a board without a date) over dates, in order, and each team's record.
+        Every day is its own board, fetched through the pool at most overview.poolSize at a time,
+        so days already in the cache or archive don't go upstream again.
+        """
+
+        sep = '' if url.endswith('?') else '&'
+        futures = [(date, self.pool.submit(self._board, "{0}{1}date={2}".format(url, sep, date), sport)) for date in dates]
+        days, missing = [], []
+        with self.timings.phase('fetch'):
+            for (date, future) in futures:
+                future.wait()
+                if future.result is None:
+                    missing.append("{0}/{1}".format(date[4:6], date[6:8]))
+                else:
+                    days.append((date, future.result))
+        # merge the days in order. games of team with the day in front, and every final into the records.
+        fullteams, ansi = self.registryValue('fullteams', msg.args[0]), not self.registryValue('disableANSI', msg.args[0])
+        abbrs = self._findteams(sport, team) if team else None
+        output, records = [], {}
+        for (date, board) in days:
+            if team:
+                lines = self._renderboard(board, sport='ncb' if sport == 'ncw' else sport, fullteams=fullteams, ansi=ansi)
+                output.extend(["{0}/{1} {2}".format(date[4:6], date[6:8], line) for line in self._matchgames(sport, team, board.games, lines)])
+            for game in board.games:
+                if game.state != 'post' or not (game.awayscore or '').isdigit() or not (game.homescore or '').isdigit():
+                    continue
+                (away, home) = (int(game.awayscore), int(game.homescore))
+                for (abbr, margin) in ((game.awayabbr, away - home), (game.homeabbr, home - away)):
+                    record = records.setdefault(abbr, [0, 0, 0])  # won, lost, tied.
+                    record[0 if margin > 0 else 1 if margin < 0 else 2] += 1
+        if abbrs:  # only team's record.
+            records = dict([(abbr, record) for (abbr, record) in records.items() if abbr in abbrs])
+        elif team:  # no team we know. no records.
+            records = {}
+        span = "{0}/{1}-{2}/{3}".format(dates[0][4:6], dates[0][6:8], dates[-1][4:6], dates[-1][6:8])
+        if team and not output:
+            output.append("No {0} games found for '{1}' {2}.".format(sport.upper(), team, span))
+        if records:  # best record first.
+            ranked = sorted(records.items(), key=lambda item: (-item[1][0], item[1][1], item[0]))
+            output.append("{0} records {1}".format(sport.upper(), span))
+            output.extend(["{0} {1}".format(abbr, "-".join([str(n) for n in (record if record[2] else record[:2])])) for (abbr, record) in ranked])
+        elif not team:
+            output.append("No final {0} games {1}.".format(sport.upper(), span))
+        if missing:
+            output.append("Could not fetch: {0}".format(", ".join(missing)))
+        self._replylines(irc, msg, output)
+
     ######################
     # DATABASE FUNCTIONS #
     ######################
 
+    def _rebuildteamsdb(self):
+        """Rebuild scores.db from scores.sql if the sql dump is newer."""
+
+        sqlfile = os.path.join(os.path.dirname(self.scoresdb), 'scores.sql')
+        if not os.path.exists(sqlfile):
+            return False
+        if os.path.exists(self.scoresdb) and os.path.getmtime(self.scoresdb) >= os.path.getmtime(sqlfile):
+            return False
+        # build into a temp file and swap it in so readers never see a partial db.
+        tmpdb = self.scoresdb + '.tmp'
+        if os.path.exists(tmpdb):
+            os.remove(tmpdb)
+        with open(sqlfile) as f:
+            sql = f.read()
+        conn = sqlite3.connect(tmpdb)
+        try:
+            conn.executescript(sql)
+            conn.commit()
+        finally:
+            conn.close()
+        os.rename(tmpdb, self.scoresdb)
+        self.log.info("_rebuildteamsdb :: Rebuilt {0} from {1}".format(self.scoresdb, sqlfile))
+        return True
+
+    def _loadteams(self):
+        """Load the teams table into memory. Returns the number of teams."""
+
+        try:  # pick up edits to scores.sql first.
+            self._rebuildteamsdb()
+        except (IOError, OSError, sqlite3.Error) as e:
+            self.log.error("_loadteams :: Could not rebuild {0}: {1}".format(self.scoresdb, e))
+        teams, aliases = {}, {}
+        conn = sqlite3.connect(self.scoresdb)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT sport, short, full FROM teams")
+            for (sport, short, full) in cursor.fetchall():
+                teams.setdefault(str(sport), {})[str(short)] = full.encode('utf-8')
+            try:
+                cursor.execute("SELECT sport, alias, short FROM aliases")
+                for (sport, alias, short) in cursor.fetchall():
+                    aliases.setdefault(str(sport), {}).setdefault(alias.encode('utf-8'), []).append(str(short))
+            except sqlite3.OperationalError:  # db from before aliases.
+                pass
+        finally:
+            conn.close()
+        # swap in the new table and start counting missing teams over. each sport's index is built on its first search.
+        self.teams, self.aliases, self.teamindexes, self.missingteams = teams, aliases, {}, {}
+        return sum([len(v) for v in teams.values()])
+
+    def _findteams(self, sport, query):
+        """Return the set of abbreviations query stands for in sport (see teamindex)."""
+
+        sport = 'ncb' if sport == 'ncw' else sport
+        if sport not in self.teams:
+            return set()
+        index = self.teamindexes.get(sport)
+        if index is None:  # two threads may both build it. same index either way.
+            index = self.teamindexes[sport] = teamindex.TeamIndex(self.teams[sport], self.aliases.get(sport))
+        return index.lookup(query)
+
+    def _matchgames(self, sport, query, games, gameslist):
+        """Return the lines of gameslist (rendered from games, in order) for the games of
+        query's teams. A query that is no team we know is looked for in the text of the lines.
+        """
+
+        (gameslist, notes) = (gameslist[:len(games)], gameslist[len(games):])  # a stale board's note comes after the games.
+        abbrs = self._findteams(sport, query)
+        if abbrs:
+            matches = [line for (game, line) in zip(games, gameslist) if game.involves(abbrs)]
+        else:
+            query = query.lower()
+            matches = [line for line in gameslist if query in ircutils.stripFormatting(line).lower()]
+        return matches + notes if matches else matches
+
     def _transteam(self, optteam, optsport=""):
         # do some regex here to parse out the team.
-        partsregex = re.compile(r'(?P<pre>\<RZ\>|\<\>)?(?P<team>[A-Z\-&;]+)(?P<rank>\(\d+\))?')
-        m = partsregex.search(optteam)
+        m = TEAMREGEX.search(optteam)
         # replace optteam with the team if we have it
         if m.group('team'):
             optteam = m.group('team')
-        # connect and do the db translation.
-        with sqlite3.connect(self.scoresdb) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT full FROM teams WHERE short=? AND sport=?", (optteam, optsport))
-            row = cursor.fetchone()
+        # do the translation.
+        team = self.teams.get(optsport, {}).get(optteam)
         # now lets check what we got back, if we got a team back.
-        if not row:  # don't have the team. log.
-            self.log.info("_transteam :: We don't have a full team name for {0} in {1}".format(optteam, optsport))
+        if not team:  # don't have the team. count it and only log the first time.
+            count = self.missingteams.get((optsport, optteam), 0) + 1
+            self.missingteams[(optsport, optteam)] = count
+            if count == 1:
+                self.log.info("_transteam :: We don't have a full team name for {0} in {1}".format(optteam, optsport))
             team = optteam
-        else:  # otherwise, we got the team, so we replace it.
-            team = str(row[0])
         # now lets build for output.
         output = ""  # blank string to start.
         # prepend the * or <RZ> if present.
@@ -354,24 +886,23 @@ class Scores(callbacks.Plugin):
         # finally, return output.
         return output
 
-    ###################################
-    # PUBLIC FUNCTIONS (ONE PER SPORT #
-    ###################################
-
-    def nba(self, irc, msg, args, optlist, optinput):
-        """[--date YYYYMMDD] [optional]
+    def _proscores(self, irc, msg, optsport, optlist, optinput):
+        """Display the scoreboard of optsport (nba, wnba, nhl or mlb) for the command of the same name."""
 
-        Display NBA scores.
-        Use --date YYYYMMDD to display scores on specific date. Ex: --date 20121225
-        Specify a string to match after to only display specific scores. Ex: Knick
-        """
-
-        # first, declare sport.
-        optsport = 'nba'
         # base url.
-        url = '%s/scoreboard?' % optsport
+        url = sports.SPORTS[optsport].url
         # declare variables we manip with input + optlist.
         showlater = True  # show all. ! below negates.
+        # a range of days (--from/--to or week) instead of one.
+        if sports.SPORTS[optsport].ranges:
+            try:
+                daterange = self._rangeargs(optlist, optinput)
+            except ValueError as e:
+                irc.reply("ERROR: {0}".format(e))
+                return
+            if daterange:
+                self._rangereply(irc, msg, optsport, url, *daterange)
+                return
         # first, we have to handle if optinput is today or tomorrow.
         if optinput:
             optinput = optinput.lower()  # lower to process.
@@ -391,38 +922,41 @@ class Scores(callbacks.Plugin):
                     else:
                         url += 'date=%s' % value
         # process url and fetch.
-        html = self._fetch(url)
-        if not html:
+        board = self._board(url, optsport)
+        if board is None:
             irc.error("ERROR: Cannot fetch {0} scores url. Try again in a minute.".format(optsport.upper()))
             return
         # process games.
-        gameslist = self._scores(html, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater)
-        # strip color/bold/ansi if option is enabled.
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
+        gameslist = self._renderboard(board, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater, ansi=not self.registryValue('disableANSI', msg.args[0]))
         # output time.
         if len(gameslist) > 0:  # process here if we have games. sometimes we do not.
             if optinput:  # we're looking for a specific team/string.
-                count = 0  # start at 0.
-                for item in gameslist:  # iterate through our items.
-                    if optinput in item.lower():  # we're lower from above. lower item to match.
-                        if count < 10:  # if less than 10 items out.
-                            irc.reply(item)  # output item.
-                            count += 1  # ++count.
-                        else:  # once we're over 10 items out.
-                            irc.reply("ERROR: I found too many matches for '{0}' in {1}. Try something more specific.".format(optinput, optsport.upper()))
-                            break
+                matches = self._matchgames(optsport, optinput, board.games, gameslist)
+                for item in matches[0:10]:  # at most 10.
+                    irc.reply(item)
+                if len(matches) > 10:
+                    irc.reply("ERROR: I found too many matches for '{0}' in {1}. Try something more specific.".format(optinput, optsport.upper()))
             else:  # no optinput so we are just displaying games.
-                if self.registryValue('lineByLineScores', msg.args[0]):  # if you want line-by-line scores, even for all.
-                    for game in gameslist:
-                        irc.reply(game)  # output each.
-                else:  # we're gonna display as much as we can on each line.
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
+                self._replylines(irc, msg, gameslist)  # as many per line as fit, or line-by-line.
         else:  # we found no games to display.
             irc.reply("ERROR: No {0} games listed.".format(optsport.upper()))
 
-    nba = wrap(nba, [getopts({'date': ('int')}), optional('text')])
+    ###################################
+    # PUBLIC FUNCTIONS (ONE PER SPORT #
+    ###################################
+
+    def nba(self, irc, msg, args, optlist, optinput):
+        """[--date YYYYMMDD | --from YYYYMMDD --to YYYYMMDD] [week] [optional]
+
+        Display NBA scores.
+        Use --date YYYYMMDD to display scores on specific date. Ex: --date 20121225
+        Use --from/--to YYYYMMDD (or week, the last 7 days) to display a range of days and each team's record. Ex: --from 20121225 --to 20121231
+        Specify a string to match after to only display specific scores. Ex: Knick
+        """
+
+        self._proscores(irc, msg, 'nba', optlist, optinput)
+
+    nba = wrap(nba, [getopts({'date': ('int'), 'from': ('int'), 'to': ('int')}), optional('text')])
 
     def wnba(self, irc, msg, args, optlist, optinput):
         """[--date YYYYMMDD] [optional]
@@ -432,195 +966,35 @@ class Scores(callbacks.Plugin):
         Specify a string to match after to only display specific scores. Ex: Minnesota
         """
 
-        # first, declare sport.
-        optsport = 'wnba'
-        # base url.
-        url = '%s/scoreboard?' % optsport
-        # declare variables we manip with input + optlist.
-        showlater = True  # show all. ! below negates.
-        # first, we have to handle if optinput is today or tomorrow.
-        if optinput:
-            optinput = optinput.lower()  # lower to process.
-            if optinput in ['yesterday', 'today', 'tomorrow', 'tonight'] or optinput in self.WEEKDAYS:
-                url += 'date=%s' % self._datetodatetime(optinput)  # centralize our date ops.
-                optinput = None  # have to declare so we're not looking for games below.
-            elif optinput == "!":
-                showlater = False  # only show completed and active (not future) games.
-                optinput = None  # have to declare so we're not looking for games below.
-        # handle optlist.
-        if optlist:  # we only have --date, for now.
-            for (key, value) in optlist:
-                if key == 'date':  # this will override today and tomorrow.
-                    if len(str(value)) != 8 or not self._validate(value, '%Y%m%d'):
-                        irc.reply("ERROR: Invalid date. Must be YYYYmmdd. Ex: --date=20120904")
-                        return
-                    else:
-                        url += 'date=%s' % value
-        # process url and fetch.
-        html = self._fetch(url)
-        if not html:
-            irc.error("ERROR: Cannot fetch {0} scores url. Try again in a minute.".format(optsport.upper()))
-            return
-        # process games.
-        gameslist = self._scores(html, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater)
-        # strip color/bold/ansi if option is enabled.
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
-        # output time.
-        if len(gameslist) > 0:  # process here if we have games. sometimes we do not.
-            if optinput:  # we're looking for a specific team/string.
-                count = 0  # start at 0.
-                for item in gameslist:  # iterate through our items.
-                    if optinput in item.lower():  # we're lower from above. lower item to match.
-                        if count < 10:  # if less than 10 items out.
-                            irc.reply(item)  # output item.
-                            count += 1  # ++count.
-                        else:  # once we're over 10 items out.
-                            irc.reply("ERROR: I found too many matches for '{0}' in {1}. Try something more specific.".format(optinput, optsport.upper()))
-                            break
-            else:  # no optinput so we are just displaying games.
-                if self.registryValue('lineByLineScores', msg.args[0]):  # if you want line-by-line scores, even for all.
-                    for game in gameslist:
-                        irc.reply(game)  # output each.
-                else:  # we're gonna display as much as we can on each line.
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
-        else:  # we found no games to display.
-            irc.reply("ERROR: No {0} games listed.".format(optsport.upper()))
+        self._proscores(irc, msg, 'wnba', optlist, optinput)
 
     wnba = wrap(wnba, [getopts({'date': ('int')}), optional('text')])
 
     def nhl(self, irc, msg, args, optlist, optinput):
-        """[--date YYYYMMDD] [optional]
+        """[--date YYYYMMDD | --from YYYYMMDD --to YYYYMMDD] [week] [optional]
 
         Display NHL scores.
         Use --date YYYYMMDD to display scores on specific date. Ex: --date 20121225
+        Use --from/--to YYYYMMDD (or week, the last 7 days) to display a range of days and each team's record. Ex: --from 20121225 --to 20121231
         Specify a string to match after to only display specific scores. Ex: Rang
         """
 
-         # first, declare sport.
-        optsport = 'nhl'
-        # base url.
-        url = '%s/scoreboard?' % optsport
-        # declare variables we manip with input + optlist.
-        showlater = True  # show all. ! below negates.
-        # first, we have to handle if optinput is today or tomorrow.
-        if optinput:
-            optinput = optinput.lower()  # lower to process.
-            if optinput in ['yesterday', 'today', 'tomorrow', 'tonight'] or optinput in self.WEEKDAYS:
-                url += 'date=%s' % self._datetodatetime(optinput)  # centralize our date ops.
-                optinput = None  # have to declare so we're not looking for games below.
-            elif optinput == "!":
-                showlater = False  # only show completed and active (not future) games.
-                optinput = None  # have to declare so we're not looking for games below.
-        # handle optlist.
-        if optlist:  # we only have --date, for now.
-            for (key, value) in optlist:
-                if key == 'date':  # this will override today and tomorrow.
-                    if len(str(value)) != 8 or not self._validate(value, '%Y%m%d'):
-                        irc.reply("ERROR: Invalid date. Must be YYYYmmdd. Ex: --date=20120904")
-                        return
-                    else:
-                        url += 'date=%s' % value
-        # process url and fetch.
-        html = self._fetch(url)
-        if not html:
-            irc.error("ERROR: Cannot fetch {0} scores url. Try again in a minute.".format(optsport.upper()))
-            return
-        # process games.
-        gameslist = self._scores(html, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater)
-        # strip color/bold/ansi if option is enabled.
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
-        # output time.
-        if len(gameslist) > 0:  # process here if we have games. sometimes we do not.
-            if optinput:  # we're looking for a specific team/string.
-                count = 0  # start at 0.
-                for item in gameslist:  # iterate through our items.
-                    if optinput in item.lower():  # we're lower from above. lower item to match.
-                        if count < 10:  # if less than 10 items out.
-                            irc.reply(item)  # output item.
-                            count += 1  # ++count.
-                        else:  # once we're over 10 items out.
-                            irc.reply("ERROR: I found too many matches for '{0}' in {1}. Try something more specific.".format(optinput, optsport.upper()))
-                            break
-            else:  # no optinput so we are just displaying games.
-                if self.registryValue('lineByLineScores', msg.args[0]):  # if you want line-by-line scores, even for all.
-                    for game in gameslist:
-                        irc.reply(game)  # output each.
-                else:  # we're gonna display as much as we can on each line.
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
-        else:  # we found no games to display.
-            irc.reply("ERROR: No {0} games listed.".format(optsport.upper()))
+        self._proscores(irc, msg, 'nhl', optlist, optinput)
 
-    nhl = wrap(nhl, [getopts({'date': ('int')}), optional('text')])
+    nhl = wrap(nhl, [getopts({'date': ('int'), 'from': ('int'), 'to': ('int')}), optional('text')])
 
     def mlb(self, irc, msg, args, optlist, optinput):
-        """[--date YYYYMMDD] [optional]
+        """[--date YYYYMMDD | --from YYYYMMDD --to YYYYMMDD] [week] [optional]
 
         Display MLB scores.
         Use --date YYYYMMDD to display scores on specific date. Ex: --date 20121225
+        Use --from/--to YYYYMMDD (or week, the last 7 days) to display a range of days and each team's record. Ex: --from 20121225 --to 20121231
         Specify a string to match after to only display specific scores. Ex: Yank
         """
 
-        # first, declare sport.
-        optsport = 'mlb'
-        # base url.
-        url = '%s/scoreboard?' % optsport
-        # declare variables we manip with input + optlist.
-        showlater = True  # show all. ! below negates.
-        # first, we have to handle if optinput is today or tomorrow.
-        if optinput:
-            optinput = optinput.lower()  # lower to process.
-            if optinput in ['yesterday', 'today', 'tomorrow', 'tonight'] or optinput in self.WEEKDAYS:
-                url += 'date=%s' % self._datetodatetime(optinput)  # centralize our date ops.
-                optinput = None  # have to declare so we're not looking for games below.
-            elif optinput == "!":
-                showlater = False  # only show completed and active (not future) games.
-                optinput = None  # have to declare so we're not looking for games below.
-        # handle optlist.
-        if optlist:  # we only have --date, for now.
-            for (key, value) in optlist:
-                if key == 'date':  # this will override today and tomorrow.
-                    if len(str(value)) != 8 or not self._validate(value, '%Y%m%d'):
-                        irc.reply("ERROR: Invalid date. Must be YYYYmmdd. Ex: --date=20120904")
-                        return
-                    else:
-                        url += 'date=%s' % value
-        # process url and fetch.
-        html = self._fetch(url)
-        if not html:
-            irc.error("ERROR: Cannot fetch {0} scores url. Try again in a minute.".format(optsport.upper()))
-            return
-        # process games.
-        gameslist = self._scores(html, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater)
-        # strip color/bold/ansi if option is enabled.
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
-        # output time.
-        if len(gameslist) > 0:  # process here if we have games. sometimes we do not.
-            if optinput:  # we're looking for a specific team/string.
-                count = 0  # start at 0.
-                for item in gameslist:  # iterate through our items.
-                    if optinput in item.lower():  # we're lower from above. lower item to match.
-                        if count < 10:  # if less than 10 items out.
-                            irc.reply(item)  # output item.
-                            count += 1  # ++count.
-                        else:  # once we're over 10 items out.
-                            irc.reply("ERROR: I found too many matches for '{0}' in {1}. Try something more specific.".format(optinput, optsport.upper()))
-                            break
-            else:  # no optinput so we are just displaying games.
-                if self.registryValue('lineByLineScores', msg.args[0]):  # if you want line-by-line scores, even for all.
-                    for game in gameslist:
-                        irc.reply(game)  # output each.
-                else:  # we're gonna display as much as we can on each line.
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
-        else:  # we found no games to display.
-            irc.reply("ERROR: No {0} games listed.".format(optsport.upper()))
+        self._proscores(irc, msg, 'mlb', optlist, optinput)
 
-    mlb = wrap(mlb, [getopts({'date': ('int')}), optional('text')])
+    mlb = wrap(mlb, [getopts({'date': ('int'), 'from': ('int'), 'to': ('int')}), optional('text')])
 
     def nfl(self, irc, msg, args, optinput):
         """[week#|team]
@@ -654,35 +1028,23 @@ class Scores(callbacks.Plugin):
         if not url:
             url = '%s/scoreboard?' % optsport
         # process url and fetch.
-        html = self._fetch(url)
-        if not html:
+        board = self._board(url, optsport)
+        if board is None:
             irc.error("ERROR: Cannot fetch {0} scores url. Try again in a minute.".format(optsport.upper()))
             return
 
         # grab the list of games.
-        gameslist = self._scores(html, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater)
-        # strip colors?
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
+        gameslist = self._renderboard(board, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater, ansi=not self.registryValue('disableANSI', msg.args[0]))
         # now we output.
         if len(gameslist) > 0:  # we have games.
             if optinput:  # we're looking for a specific team/string.
-                count = 0  # count to make sure we don't output too much.
-                for item in gameslist:  # iterate over each.
-                    if optinput.lower() in item.lower():  # look for matches.
-                        if count < 10:  # less than 10, output.
-                            irc.reply(item)
-                            count += 1
-                        else:  # too many matches.
-                            irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
-                            break
+                matches = self._matchgames(optsport, optinput, board.games, gameslist)
+                for item in matches[0:10]:  # at most 10.
+                    irc.reply(item)
+                if len(matches) > 10:
+                    irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
             else:  # output line-by-line.
-                if self.registryValue('lineByLineScores', msg.args[0]):
-                    for game in gameslist:
-                        irc.reply(game)
-                else:  # when we do general output, max each per line.
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
+                self._replylines(irc, msg, gameslist)  # as many per line as fit, or line-by-line.
         else:  # we don't have any games.
             irc.reply("ERROR: No {0} games listed.".format(optsport.upper()))
 
@@ -699,12 +1061,8 @@ class Scores(callbacks.Plugin):
         # before anything, define optsport
         optsport = 'ncf'
 
-        # football confs. translates text to groupid for lookup.
-        validconfs = {'top25':'999', 'acc':'1', 'aac':'151', 'big12':'4', 'bigsky':'20', 'bigsouth':'40',
-                      'big10':'5', 'cusa':'12', 'caa':'48', 'independent':'32', 'greatwest':'43',
-                      'ivy':'22', 'mac':'15', 'meac':'24', 'mvc':'21', 'mwc':'17', 'i-a':'80', 'i-aa':'81',
-                      'nec':'25', 'ovc':'26', 'pac12':'9', 'patriot':'27', 'pioneer':'28', 'sec':'8',
-                      'southern':'29', 'southland':'30', 'sunbelt':'37', 'swac':'31' }
+        # football confs. translates text to groupid for lookup. built once in sports.
+        validconfs = sports.SPORTS['ncf'].confs
 
         # default vars.
         showlater = True
@@ -733,57 +1091,41 @@ class Scores(callbacks.Plugin):
             url = 'ncf/scoreboard?groupId=%s' % validconfs['top25']
 
         # finally, fetch scores via http.
-        html = self._fetch(url)
-        if not html:
+        board = self._board(url, optsport)
+        if board is None:
             irc.error("ERROR: Cannot fetch NCAAF scores url. Try again in a minute.")
             return
 
         # now, process html and put all into gameslist.
-        gameslist = self._scores(html, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater)
-
-        # strip ANSI if needed.
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
+        gameslist = self._renderboard(board, sport=optsport, fullteams=self.registryValue('fullteams', msg.args[0]), showlater=showlater, ansi=not self.registryValue('disableANSI', msg.args[0]))
 
         # finally, check if there is any games/output.
         if len(gameslist) > 0: # if we have games
             if optinput: # if we have input.
-                count = 0
-                for item in gameslist:  # check if anything matches.
-                    if optinput in item.lower():  # input is lowered from above. match.
-                        if count < 10:
-                            irc.reply(item)
-                            count += 1
-                        else:
-                            irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
-                            break
+                matches = self._matchgames(optsport, optinput, board.games, gameslist)
+                for item in matches[0:10]:  # at most 10.
+                    irc.reply(item)
+                if len(matches) > 10:
+                    irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
             else:  # special case.
-                if self.registryValue('lineByLineScores', msg.args[0]):
-                    for game in gameslist:
-                        irc.reply(game)
-                else:  # fit all we can per line.
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
+                self._replylines(irc, msg, gameslist)  # as many per line as fit, or line-by-line.
         else:  # no games
             irc.reply("ERROR: No college football games listed.")
 
     cfb = wrap(cfb, [optional('text')])
 
     def ncb(self, irc, msg, args, optlist, optconf):
-        """[--date YYYYMMDD] [tournament|conference|team
+        """[--date YYYYMMDD | --from YYYYMMDD --to YYYYMMDD] [week] [tournament|conference|team
 
         Display College Basketball scores.
         Optional: Use --date YYYYMMDD to display scores on specific date. Ex: --date 20121225
+        Optional: Use --from/--to YYYYMMDD (or week, the last 7 days) to display a range of days and each team's record. Ex: week duke
         Optional: input CONFERENCE or TEAM to search scores by conference or display an individual team's score. Ex: SEC or Bama.
         Optional: input tournament to display scores. Ex: ncaa, nit.
         """
 
-        # basketball confs.
-        validconfs = {'top25':'999', 'a10':'3', 'acc':'2', 'ameast':'1', 'big12':'8', 'bigeast':'4', 'bigsky':'5', 'bigsouth':'6', 'big10':'7',
-                      'bigwest':'9', 'c-usa':'11', 'caa':'10', 'greatwest':'57', 'horizon':'45', 'independent':'43', 'ivy':'12', 'maac':'13',
-                      'mac':'14', 'meac':'16', 'mvc':'18', 'mwc':'44', 'div-i':'50', 'nec':'19', 'non-div-i':'51', 'ovc':'20', 'pac12':'21',
-                      'patriot':'22', 'sec':'23', 'southern':'24', 'southland':'25', 'summit':'49', 'sunbelt':'27', 'swac':'26', 'wac':'30',
-                      'wcc':'29', 'ncaa':'100', 'nit':'50', 'cbi':'55', 'cit':'56' }
+        # basketball confs. built once in sports.
+        validconfs = sports.SPORTS['ncb'].confs
 
         # if we have a specific conf to display, get the id.
         optinput = None
@@ -800,6 +1142,16 @@ class Scores(callbacks.Plugin):
         else:
             url = 'ncb/scoreboard?groupId=%s' % validconfs['top25']
 
+        # a range of days (--from/--to or week) instead of one.
+        try:
+            daterange = self._rangeargs(optlist, optinput)
+        except ValueError as e:
+            irc.reply("ERROR: {0}".format(e))
+            return
+        if daterange:
+            self._rangereply(irc, msg, 'ncb', url, *daterange)
+            return
+
         # handle date
         if optlist:
             for (key, value) in optlist:
@@ -810,40 +1162,27 @@ class Scores(callbacks.Plugin):
                     else:
                         url += '&date=%s' % value
 
-        html = self._fetch(url)
-        if not html:
+        board = self._board(url, 'ncb')
+        if board is None:
             irc.error("ERROR: Cannot fetch NCB scores.")
             return
         # now, process html and put all into gameslist.
-        gameslist = self._scores(html, sport='ncb', fullteams=self.registryValue('fullteams', msg.args[0]))
-
-        # strip ANSI if needed.
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
+        gameslist = self._renderboard(board, sport='ncb', fullteams=self.registryValue('fullteams', msg.args[0]), ansi=not self.registryValue('disableANSI', msg.args[0]))
 
         # finally, check if there is any games/output.
         if len(gameslist) > 0:  # if we have games
             if optinput:  # if we have input.
-                count = 0
-                for item in gameslist:
-                    if optinput.lower() in item.lower():
-                        if count < 10:
-                            irc.reply(item)
-                            count += 1
-                        else:
-                            irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
-                            break
+                matches = self._matchgames('ncb', optinput, board.games, gameslist)
+                for item in matches[0:10]:  # at most 10.
+                    irc.reply(item)
+                if len(matches) > 10:
+                    irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
             else:
-                if self.registryValue('lineByLineScores', msg.args[0]):
-                    for game in gameslist:
-                        irc.reply(game)
-                else:
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
+                self._replylines(irc, msg, gameslist)  # as many per line as fit, or line-by-line.
         else:  # no games
             irc.reply("ERROR: No college basketball games listed.")
 
-    ncb = wrap(ncb, [getopts({'date': ('int')}), optional('text')])
+    ncb = wrap(ncb, [getopts({'date': ('int'), 'from': ('int'), 'to': ('int')}), optional('text')])
 
     def ncw(self, irc, msg, args, optlist, optconf):
         """[--date YYYYMMDD] [conference|team]
@@ -854,12 +1193,8 @@ class Scores(callbacks.Plugin):
         Optional: input tournament to display scores. Ex: ncaa, nit.
         """
 
-        # basketball confs.
-        validconfs = {'top25':'999', 'a10':'3', 'acc':'2', 'ameast':'1', 'big12':'8', 'bigeast':'4', 'bigsky':'5', 'bigsouth':'6', 'big10':'7',
-                      'bigwest':'9', 'c-usa':'11', 'caa':'10', 'greatwest':'57', 'horizon':'45', 'independent':'43', 'ivy':'12', 'maac':'13',
-                      'mac':'14', 'meac':'16', 'mvc':'18', 'mwc':'44', 'div-i':'50', 'nec':'19', 'non-div-i':'51', 'ovc':'20', 'pac12':'21',
-                      'patriot':'22', 'sec':'23', 'southern':'24', 'southland':'25', 'summit':'49', 'sunbelt':'27', 'swac':'26', 'wac':'30',
-                      'wcc':'29', 'ncaa':'100', 'nit':'50', 'cbi':'55' }
+        # basketball confs. built once in sports.
+        validconfs = sports.SPORTS['ncw'].confs
 
         # if we have a specific conf to display, get the id.
         optinput = None
@@ -886,294 +1221,386 @@ class Scores(callbacks.Plugin):
                     else:
                         url += '&date=%s' % value
 
-        html = self._fetch(url)
-        if not html:
+        board = self._board(url, 'ncw')
+        if board is None:
             irc.error("ERROR: Cannot fetch women's college basketball scores.")
             return
 
         # now, process html and put all into gameslist.
-        gameslist = self._scores(html, sport='ncb', fullteams=self.registryValue('fullteams', msg.args[0]))
-
-        # strip ANSI if needed.
-        if self.registryValue('disableANSI', msg.args[0]):
-            gameslist = [ircutils.stripFormatting(item) for item in gameslist]
+        gameslist = self._renderboard(board, sport='ncb', fullteams=self.registryValue('fullteams', msg.args[0]), ansi=not self.registryValue('disableANSI', msg.args[0]))
 
         # finally, check if there is any games/output.
         if len(gameslist) > 0:  # if we have games
             if optinput:  # if we have input.
-                count = 0
-                for item in gameslist:
-                    if optinput.lower() in item.lower():
-                        if count < 10:
-                            irc.reply(item)
-                            count += 1
-                        else:
-                            irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
-                            break
+                matches = self._matchgames('ncw', optinput, board.games, gameslist)
+                for item in matches[0:10]:  # at most 10.
+                    irc.reply(item)
+                if len(matches) > 10:
+                    irc.reply("I found too many matches for '{0}'. Try something more specific.".format(optinput))
             else:
-                if self.registryValue('lineByLineScores', msg.args[0]):
-                    for game in gameslist:
-                        irc.reply(game)
-                else:
-                    for splice in self._splicegen('380', gameslist):
-                        irc.reply(" | ".join([gameslist[item] for item in splice]))
+                self._replylines(irc, msg, gameslist)  # as many per line as fit, or line-by-line.
         else:  # no games
             irc.reply("ERROR: No women's college basketball games listed.")
 
     ncw = wrap(ncw, [getopts({'date': ('int')}), optional('text')])
 
+    def _tennisdraw(self, url):
+        """Fetch url and return its draws.Draw, None if we can't fetch it.
+        The page is only parsed when it changes.
+        """
+
+        html = self._fetch(url, sport='tennis')
+        if not html:
+            return None
+        board = self.boards.get(url)
+        if board and (board.html is html or board.html == html):  # same page. use the parse (and index) we have.
+            return board.games
+        # one easy sanity check.
+        if "There are no matches scheduled." in html:
+            draw = draws.Draw(None, None, None, [], note="There are no tennis matches scheduled.")
+            self.boards.set(url, cache.Board(html, draw))
+            return draw
+        # process html.
+        with self.timings.phase('parse'):
+            soup = sports.module('parsers').page(html)
+            divs = soup.findAll('div', attrs={'class':re.compile('^ind|^ind alt')})
+            matches = []
+            # each 'each' is a match.
+            for each in divs:
+                if each.find('b'):  # <b> means it is a tennis match.
+                    status = each.find('b').extract().getText()
+                    matchText = []  # smoosh the results together into here.
+                    for item in each.contents:
+                        if isinstance(item, sports.module('parsers').NavigableString):
+                            matchText.append(item.strip())
+                    matches.append(draws.Match(status, " ".join(matchText)))
+            if len(matches) < 1:  # second sanity check.
+                draw = draws.Draw(None, None, None, [], note="No tennis matches found. No tournament going on?")
+            else:
+                headers = soup.findAll('div', attrs={'class':'ind sub bold'})  # there are two here. the draw, then the round.
+                draw = draws.Draw(headers[0].getText(), soup.find('div', attrs={'class':'sec row'}).getText(), headers[1].getText(), matches)
+        self.boards.set(url, cache.Board(html, draw))
+        return draw
+
+    def _tennismatch(self, match):
+        """Render a draws.Match."""
+
+        status = self._red("F") if match.final() else self._bold(match.status)
+        return "{0} :: {1}".format(status, match.text)
+
+    def _tennistitle(self, draw, withround=True):
+        title = draw.title
+        if self.registryValue('wilbonton'):  # this has to be set via the config and is a special option.
+            title = title.replace('WIMBLEDON', 'WILBONTON')  # replace if on.
+        return "{0} {1}".format(self._bold(title), self._bold(draw.round)) if withround else self._bold(title)
+
+    def _tennisall(self, irc, msg, optinput):
+        """Reply with optinput's matches from every draw. The draws are fetched through the pool."""
+
+        futures = [(name, self.pool.submit(self._tennisdraw, 'general/tennis/dailyresults?matchType=' + matchType)) for (name, matchType) in draws.DRAWS]
+        title, output, missing = None, [], []
+        with self.timings.phase('fetch'):
+            for (name, future) in futures:
+                future.wait()
+                draw = future.result
+                if draw is None:
+                    missing.append(name)
+                    continue
+                if draw.note:
+                    continue
+                for match in draw.find(optinput):
+                    title = title or self._tennistitle(draw, withround=False)
+                    output.append("{0} {1} {2}".format(self._bold(draw.name), draw.round, self._tennismatch(match)))
+        if not output:
+            output.append("I did not find any tennis matches for '{0}'.".format(optinput))
+        elif title:
+            irc.reply(title)
+        if missing:
+            output.append("Could not fetch: {0}".format(", ".join(missing)))
+        self._replylines(irc, msg, output)
+
     def tennis(self, irc, msg, args, optmatch, optinput):
-        """[mens|womens|mensdoubles|womensdoubles|mixeddoubles]
+        """[mens|womens|mensdoubles|womensdoubles|mixeddoubles|all]
 
         Display current Tennis scores. Defaults to Men's Singles.
         Call with argument to display others. Ex: womens.
         Can also find a specific match via string. Ex: mens nadal or womensdoubles williams.
+        all searches every draw at once. Ex: all williams
         """
 
+        matchTypes = dict(draws.DRAWS)
         if optmatch:
             optmatch = optmatch.lower()
-            if optmatch == "mens":
-                matchType = "1"
-            elif optmatch == "womens":
-                matchType = "2"
-            elif optmatch == "mensdoubles":
-                matchType = "3"
-            elif optmatch == "womensdoubles":
-                matchType = "4"
-            elif optmatch == "mixeddoubles":
-                matchType = "6"
+            if optmatch == "all":
+                if not optinput:
+                    irc.reply("ERROR: tennis all needs a player to look for. Ex: all williams")
+                    return
+                self._tennisall(irc, msg, optinput)
+                return
+            elif optmatch in matchTypes:
+                matchType = matchTypes[optmatch]
             else:  # default to mens.
                 matchType = "1"
                 optinput = optmatch  # if someone inputs tennis federer, this gets set.
         else:
             matchType = "1"
-        # build and fetch url.
-        html = self._fetch('general/tennis/dailyresults?matchType=' + matchType)
-        if not html:
+        # fetch (or reuse) the parsed draw.
+        draw = self._tennisdraw('general/tennis/dailyresults?matchType=' + matchType)
+        if not draw:
             irc.error("ERROR: Cannot fetch Tennis scores. Please wait a minute or two.")
             return
-        # one easy sanity check.
-        if "There are no matches scheduled." in html:
-            irc.reply("ERROR: There are no tennis matches scheduled.")
+        if draw.note:
+            irc.reply("ERROR: {0}".format(draw.note))
             return
-        # process html.
-        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
-        matches = soup.findAll('div', attrs={'class':re.compile('^ind|^ind alt')})
-        if len(matches) < 1:  # second sanity check.
-            irc.reply("ERROR: No tennis matches found. No tournament going on?")
-            return
-        title = soup.find('div', attrs={'class':'sec row'}).getText()
-        if self.registryValue('wilbonton'):  # this has to be set via the config and is a special option.
-            title = title.replace('WIMBLEDON', 'WILBONTON')  # replace if on.
-        tennisRound = soup.findAll('div', attrs={'class':'ind sub bold'})[1]  # there are two here so grab the 2nd (1).
-        # output container.
-        output = []
-        # each 'each' is a match.
-        for each in matches:
-            if each.find('b'):  # <b> means it is a tennis match.
-                status = each.find('b').extract()
-                if status.text == "Final":
-                    status = self._red("F")
-                else:
-                    status = self._bold(status.getText())
-                matchText = []  # smoosh the results together into here.
-                for item in each.contents:
-                    if isinstance(item, NavigableString):
-                        matchText.append(item.strip())
-                output.append("{0} :: {1}".format(status, " ".join(matchText)))
         # now output.
         if not optinput:  # just display scores.
-            irc.reply("{0} {1}".format(self._bold(title), self._bold(tennisRound.getText())))
-            irc.reply("{0}".format(" | ".join(output)))
+            irc.reply(self._tennistitle(draw))
+            self._replylines(irc, msg, [self._tennismatch(match) for match in draw.matches])
         else:  # looking for something specific.
-            count = 0  # for max 5.
-            for each in output:
-                if optinput.lower() in each.lower():  # if we find a match.
-                    if count == 0:  # display the title on the first.
-                        irc.reply("{0} {1}".format(self._bold(title), self._bold(tennisRound.getText())))
-                        irc.reply(each)
-                        count += 1  # i++
-                    elif count < 5:  # only show five.
-                        irc.reply(each)
-                        count += 1  # i++
-                    else:  # above this, display the error.
-                        irc.reply("I found too many results for '{0}'. Please specify something more specific".format(optinput))
-                        break
+            found = draw.find(optinput)
+            if found:  # display the title on the first.
+                irc.reply(self._tennistitle(draw))
+            for match in found[0:5]:  # only show five.
+                irc.reply(self._tennismatch(match))
+            if len(found) > 5:  # above this, display the error.
+                irc.reply("I found too many results for '{0}'. Please specify something more specific".format(optinput))
 
     tennis = wrap(tennis, [optional('somethingWithoutSpaces'), optional('text')])
 
-    def golf(self, irc, msg, args, optseries, optinput):
-        """[pga|web.com|champions|lpga|euro]
+    def _golfboard(self, url):
+        """Fetch url and return its leaderboard.Leaderboard, None if we can't
+        fetch it. The page is only parsed when it changes.
+        """
+
+        html = self._fetch(url, sport='golf')
+        if not html:
+            return None
+        board = self.boards.get(url)
+        if board and (board.html is html or board.html == html):  # same page. use the parse we have.
+            return board.games
+        with self.timings.phase('parse'):
+            soup = sports.module('parsers').page(html)
+            golfEvent = soup.find('div', attrs={'class': 'sub dark big'})
+            golfStatus = soup.find('div', attrs={'class': 'sec row', 'style': 'white-space: nowrap;'})
+            event = golfEvent.getText() if golfEvent else None
+            status = golfStatus.getText() if golfStatus else None
+            if event and event.startswith("Ryder Cup"):  # if Ryder Cup found, it should just display scores.
+                rows = soup.find('div', attrs={'class':'ind'})
+                golf = leaderboard.Leaderboard(event, status, [], note=rows.getText())
+            else:  # regular tournaments.
+                table = soup.find('table', attrs={'class': 'wide'})
+                players = []
+                for row in (table.findAll('tr')[1:] if table else []):  # skip header row. each row is a player.
+                    tds = row.findAll('td')
+                    pRank = tds[0].getText()
+                    pPlayer = tds[1].getText().encode('utf-8')
+                    pScore = tds[2].getText()
+                    pRound = tds[3].getText()
+                    pRound = pRound.replace('(', '').replace(')', '')  # remove ( ). We process pRound later.
+                    # not started also includes cut.
+                    if pScore == "CUT":  # we won't have a pRound score in this case
+                        pRound = None
+                    elif "am" not in pRound and "pm" not in pRound:  # player has started.
+                        pRound = pRound.split(' ', 1)  # we split -2 (F), but might not be two.
+                        if len(pRound) == 2:  # normally, it looks like -2 (F). We want the F.
+                            pRound = pRound[1]
+                        else:  # It is just -9 like for a playoff.
+                            pRound = pRound[0]
+                    players.append(leaderboard.Player(pRank, pPlayer, pScore, pRound))
+                golf = leaderboard.Leaderboard(event, status, players)
+        self.boards.set(url, cache.Board(html, golf))
+        return golf
+
+    def _golfplayer(self, player):
+        """Render a leaderboard.Player."""
+
+        if player.thru is None:
+            return "{0}. {1} {2}".format(player.rank, self._bold(player.player), player.score)
+        return "{0}. {1} {2} ({3})".format(player.rank, self._bold(player.player), player.score, player.thru)
+
+    def golf(self, irc, msg, args, optlist, optinput):
+        """[--around] [pga|web.com|champions|lpga|euro] [top <n>|<player>]
 
         Display current Golf scores from a tournament. Specify a specific series to show different scores.
-        Ex: lpga
+        top <n> shows the leaders down to position n. --around <player> shows the positions around a player.
+        Ex: lpga or top 10 or --around woods
         """
 
-        if optseries:
-            optseries = optseries.lower()
-            if optseries == "pga":
-                seriesId = "1"
-            if optseries == "web.com":
-                seriesId = "2"
-            elif optseries == "champions":
-                seriesId = "3"
-            elif optseries == "lpga":
-                seriesId = "4"
-            elif optseries == "euro":
-                seriesId = "5"
-            else:  # default to pga tour.
-                seriesId = "1"
-                optinput = optseries  # this means someone did a command like 'golf woods' and wants tiger's score.
-        else:  # go pga if we don't have a series.
+        seriesIds = {'pga': '1', 'web.com': '2', 'champions': '3', 'lpga': '4', 'euro': '5'}
+        words = optinput.split() if optinput else []
+        if words and words[0].lower() in seriesIds:
+            seriesId = seriesIds[words.pop(0).lower()]
+        else:  # default to pga tour. 'golf woods' wants tiger's score.
             seriesId = "1"
-        # build and fetch url.
-        html = self._fetch('golf/eventresult?seriesId=' + seriesId)
-        if not html:
+        if len(words) == 2 and words[0].lower() == 'top' and words[1].isdigit() and int(words[1]) < 1:
+            irc.reply("ERROR: top needs a position of 1 or more. Ex: top 10")
+            return
+        # fetch (or reuse) the parsed leaderboard.
+        golf = self._golfboard('golf/eventresult?seriesId=' + seriesId)
+        if not golf:
             irc.error("ERROR: Cannot fetch Golf scores.")
             return
-        # process html.
-        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
-        golfEvent = soup.find('div', attrs={'class': 'sub dark big'})
-        golfStatus = soup.find('div', attrs={'class': 'sec row', 'style': 'white-space: nowrap;'})
-        # check for Ryder Cup.
-        if golfEvent.getText().startswith("Ryder Cup"):  # if Ryder Cup found, it should just display scores.
-            rows = soup.find('div', attrs={'class':'ind'})
-            irc.reply(self._green(golfEvent.getText()))
-            irc.reply("{0}".format(rows.getText()))
+        if golf.note is not None:  # Ryder Cup.
+            irc.reply(self._green(golf.event))
+            irc.reply("{0}".format(golf.note))
+            return
+        if not golf.players:
+            irc.reply("ERROR: Could not find golf results. Tournament not going on?")
             return
-        else:  # regular tournaments.
-            table = soup.find('table', attrs={'class': 'wide'})
-            if not table:
-                irc.reply("ERROR: Could not find golf results. Tournament not going on?")
-                return
-            rows = table.findAll('tr')[1:]  # skip header row.
-        # container for output.
-        append_list = []
-        # process rows. each row is a player.
-        for row in rows:
-            tds = row.findAll('td')
-            pRank = tds[0].getText()
-            pPlayer = tds[1].getText().encode('utf-8')
-            pScore = tds[2].getText()
-            pRound = tds[3].getText()
-            pRound = pRound.replace('(', '').replace(')', '')  # remove ( ). We process pRound later.
-            # handle strings differently, depending on if started or not. not started also includes cut.
-            if "am" in pRound or "pm" in pRound or pScore == "CUT":  # append string conditional if they started or not.
-                if pScore == "CUT":  # we won't have a pRound score in this case
-                    appendString = "{0}. {1} {2}".format(pRank, self._bold(pPlayer), pScore)
-                else:
-                    appendString = "{0}. {1} {2} ({3})".format(pRank, self._bold(pPlayer), pScore, pRound)
-            else:  # player has started.
-                pRound = pRound.split(' ', 1)  # we split -2 (F), but might not be two.
-                if len(pRound) == 2:  # normally, it looks like -2 (F). We want the F.
-                    pRound = pRound[1]
-                else:  # It is just -9 like for a playoff.
-                    pRound = pRound[0]
-                appendString = "{0}. {1} {2} ({3})".format(pRank, self._bold(pPlayer), pScore, pRound)
-            # append now.
-            append_list.append(appendString)
         # output time.
-        if golfEvent and golfStatus:  # header/tournament
-            irc.reply("{0} - {1}".format(self._green(golfEvent.getText()), self._bold(golfStatus.getText())))
-        if not optinput:  # just show the leaderboard
-            irc.reply(" | ".join([item for item in append_list]))
+        if golf.event and golf.status:  # header/tournament
+            irc.reply("{0} - {1}".format(self._green(golf.event), self._bold(golf.status)))
+        optinput = " ".join(words)
+        if 'around' in dict(optlist):  # the positions near a player.
+            (player, players) = golf.around(optinput, self.registryValue('golf.around'))
+            if not player:
+                irc.reply("I did not find anyone named '{0}' on the leaderboard.".format(optinput))
+                return
+            self._replylines(irc, msg, [self._golfplayer(p) for p in players])
+        elif len(words) == 2 and words[0].lower() == 'top' and words[1].isdigit():  # the leaders.
+            players = golf.top(int(words[1]))
+            if not players:
+                irc.reply("There are no players in the top {0}.".format(words[1]))
+                return
+            self._replylines(irc, msg, [self._golfplayer(p) for p in players])
+        elif not optinput:  # just show the leaderboard. the rest goes to more.
+            self._replylines(irc, msg, [self._golfplayer(p) for p in golf.players])
         else:  # display a specific player's score.
-            count = 0  # for max 5.
-            for each in append_list:
-                if optinput.lower() in each.lower():  # if we find a match.
-                    if count < 5:  # only show five.
-                        irc.reply(each)
-                        count += 1  # ++1
-                    else:  # above this, display the error.
-                        irc.reply("I found too many results for '{0}'. Please specify something more specific".format(optinput))
-                        break
+            found = golf.find(optinput)
+            for i in found[0:5]:  # only show five.
+                irc.reply(self._golfplayer(golf.players[i]))
+            if len(found) > 5:  # above this, display the error.
+                irc.reply("I found too many results for '{0}'. Please specify something more specific".format(optinput))
+
+    golf = wrap(golf, [getopts({'around': ''}), optional('text')])
+
+    def _raceboard(self, url, sport, force=False):
+        """Fetch url and return its races.Race, None if we can't fetch it.
+        The page is only parsed when it changes, and every new parse is a
+        snapshot for the tracker.
+        """
+
+        html = self._fetch(url, sport=sport, force=force)
+        if not html:
+            return None
+        board = self.boards.get(url)
+        if board and (board.html is html or board.html == html):  # same page. use the parse we have.
+            return board.games
+        # process html.
+        with self.timings.phase('parse'):
+            soup = sports.module('parsers').page(html)
+            name = soup.find('div', attrs={'class': 'sub dark big'}).getText().replace(' Results', '').strip()
+            status = soup.find('div', attrs={'class': 'sec row'}).getText().strip()
+            # table with results
+            rtable = soup.find('table', attrs={'class': 'wide', 'cellspacing': '0', 'width': '100%'})
+            rows = []  # no table (between races) is no rows, so the race isn't live.
+            for row in (rtable.findAll('tr')[1:] if rtable else []):  # header row is 0. one row per driver.
+                tds = [item.getText().strip() for item in row.findAll('td')]
+                rows.append((tds[0], tds[1].encode('utf-8'), tds[2] if len(tds) > 2 else None))
+            race = races.Race(name, status, rows)
+        self.boards.set(url, cache.Board(html, race))
+        self.races.record(url, race)
+        return race
+
+    def _racereply(self, irc, msg, series, optinput, change):
+        """Reply to nascar/racing. optinput is what came after the command:
+        a series, and change (movers or gaps) with the number of polls to look back.
+        """
 
-    golf = wrap(golf, [optional('somethingWithoutSpaces'), optional('text')])
+        words = optinput.lower().split() if optinput else []
+        wanted = [word for word in words if word in races.SERIES and races.SERIES[word][0] == races.SERIES[series][0]]
+        series = wanted[0] if wanted else series
+        (sport, url) = races.SERIES[series]
+        if change not in words:  # the standings.
+            race = self._raceboard(url, sport)
+            if not race:
+                irc.error("ERROR: Cannot fetch {0}.".format("NASCAR standings" if sport == 'nascar' else "racing results"))
+                return
+            irc.reply("{0} :: {1}".format(self._red(race.name), self._ul(race.status)))
+            if sport == 'nascar':
+                self._replylines(irc, msg, ["{0}. {1}{2}".format(position, self._bold(driver), " - {0}".format(behind) if behind is not None else "") for (position, driver, behind) in race.rows])
+            else:
+                self._replylines(irc, msg, ["{0}. {1}".format(position, self._bold(driver)) for (position, driver, behind) in race.rows])
+            return
+        # the biggest position changes, out of the snapshots the tracker (and these commands) took. nothing is fetched.
+        polls = [int(word) for word in words if word.isdigit()]
+        polls = polls[0] if polls else self.registryValue('races.window')
+        if polls < 1:
+            irc.reply("ERROR: {0} needs 1 or more polls to look back over.".format(change))
+            return
+        (held, moved) = self.races.movers(url, polls)
+        if not held:
+            irc.reply("I have no snapshots of the {0} race yet.{1}".format(series, "" if self.registryValue('races.enabled') else " Turn on races.enabled to track live races."))
+            return
+        polls = min(polls, held - 1)  # we can't look back further than the oldest we hold.
+        track = self.races.tracks[url]
+        irc.reply("{0} :: {1} :: {2} over the last {3} polls".format(self._red(track.race), self._ul(track.status), change, polls))
+        if not moved:
+            irc.reply("No position changes over the last {0} polls.".format(polls))
+            return
+        self._replylines(irc, msg, ["{0} {1}{2} (P{3})".format(self._bold(driver), "+" if gained > 0 else "", gained, now) for (driver, gained, now) in moved])
 
-    def nascar(self, irc, msg, args, optrace):
-        """[sprintcup|nationwide|trucks]
+    def nascar(self, irc, msg, args, optinput):
+        """[movers] [sprintcup|nationwide|trucks] [polls]
 
         Display active NASCAR results from most current race.
         Defaults to Sprint Cup. Specify 'nationwide' or 'trucks' for other series.
+        movers shows the biggest position changes over the last polls the race tracker took.
         """
 
-        if optrace:
-            optrace = optrace.lower()
-            if optrace == "sprintcup":
-                raceType = "2"
-            elif optrace == "nationwide":
-                raceType = "3"
-            elif optrace == "trucks":
-                raceType = "4"
-            else:  # default to sprintcup.
-                raceType = "2"
-        else:  # default to sprintcup.
-            raceType = "2"
-        # build and fetch url.
-        html = self._fetch('rpm/nascar/eventresult?seriesId=' + raceType)
-        if not html:
-            irc.error("ERROR: Cannot fetch NASCAR standings.")
-            return
-        # process html.
-        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
-        race = soup.find('div', attrs={'class': 'sub dark big'}).getText().replace(' Results', '').strip()
-        racestatus = soup.find('div', attrs={'class': 'sec row'}).getText().strip()
-        # table with results
-        rtable = soup.find('table', attrs={'class': 'wide', 'cellspacing': '0', 'width': '100%'})
-        rows = rtable.findAll('tr')[1:]  # header row is 0.
-        # list container for out.
-        standings = []
-        # one row per driver.
-        for row in rows:
-            tds = [item.getText().strip() for item in row.findAll('td')]
-            standings.append("{0}. {1} - {2}".format(tds[0], self._bold(tds[1].encode('utf-8')), tds[2]))
-        # output time.
-        irc.reply("{0} :: {1}".format(self._red(race), self._ul(racestatus)))
-        irc.reply("{0}".format(" | ".join(standings)))
+        self._racereply(irc, msg, 'sprintcup', optinput, 'movers')
 
-    nascar = wrap(nascar, [optional('somethingWithoutSpaces')])
+    nascar = wrap(nascar, [optional('text')])
 
-    def racing(self, irc, msg, args, optrace):
-        """[f1|indycar]
+    def racing(self, irc, msg, args, optinput):
+        """[gaps] [f1|indycar] [polls]
 
         Display various race results.
-        Defaults to F1.
-        Ex: f1 or indycar
+        Defaults to F1. gaps shows the biggest position changes over the last polls the race tracker took.
+        Ex: f1 or indycar or gaps indycar 5
         """
 
-        if optrace:
-            optrace = optrace.lower()
-            if optrace == "f1":
-                raceType = "6"
-            elif optrace == "indycar":
-                raceType = "1"
-            else: # defaults to F1.
-                raceType = "6"
-        else:
-            raceType = "6"
-        # build and fetch url.
-        html = self._fetch('rpm/eventresult?season=-1&seriesId=' + raceType)
-        if not html:
-            irc.error("ERROR: Cannot fetch racing results.")
+        self._racereply(irc, msg, 'f1', optinput, 'gaps')
+
+    racing = wrap(racing, [optional('text')])
+
+    #########
+    # RACES #
+    #########
+
+    def _racetick(self):
+        """Scheduled every REFRESHTICK seconds. Polls each series every races.interval
+        seconds while it has a live race and every races.idleInterval seconds otherwise.
+        """
+
+        if not self.registryValue('races.enabled'):
             return
-        # process html.
-        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
-        race = soup.find('div', attrs={'class': 'sub dark big'}).getText().replace(' Results', '').strip()
-        racestatus = soup.find('div', attrs={'class': 'sec row'}).getText().strip()
-        # table with rows.
-        rtable = soup.find('table', attrs={'class': 'wide', 'cellspacing': '0', 'width': '100%'})
-        rows = rtable.findAll('tr')[1:]  # first is the header.
-        # list container for output
-        standings = []
-        # one row per racer
-        for row in rows:
-            tds = [item.getText().strip() for item in row.findAll('td')]
-            standings.append("{0}. {1}".format(tds[0], self._bold(tds[1])))
-        # output time.
-        irc.reply("{0} :: {1}".format(self._red(race), self._ul(racestatus)))
-        irc.reply("{0}".format(" | ".join(standings)))
+        now = time.time()
+        with self.racelock:
+            due = [series for series in sorted(races.SERIES) if self.racenext.get(series, 0) <= now]
+            if self.racebusy or not due:
+                return
+            self.racebusy = True
+        # poll in the background so we don't block the bot.
+        t = threading.Thread(target=self._racepoll, args=(due,), name='Thread #%s (Scores race tracker)' % world.threadsSpawned)
+        world.threadsSpawned += 1
+        t.setDaemon(True)
+        t.start()
+
+    def _racepoll(self, due):
+        """Fetch the results of the due series. Each new page is a snapshot (see _raceboard)."""
+
+        try:
+            for series in due:
+                (sport, url) = races.SERIES[series]
+                race = self._raceboard(url, sport, force=True)
+                interval = self.registryValue('races.interval') if race and race.live() else self.registryValue('races.idleInterval')
+                with self.racelock:
+                    self.racenext[series] = time.time() + interval
+        finally:
+            with self.racelock:
+                self.racebusy = False
 
-    racing = wrap(racing, [optional('somethingWithoutSpaces')])
 
     def d1bb(self, irc, msg, args, optinput):
         """[team]
@@ -1184,7 +1611,7 @@ class Scores(callbacks.Plugin):
         # build and fetch url.
         try:
             url = b64decode('aHR0cDovL3d3dy5kMWJhc2ViYWxsLmNvbS9kYWlseS90b2RheS5odG0=')
-            html = utils.web.getUrl(url)
+            html = self._geturl(url, 'd1bb')
         except utils.web.Error as e:
             self.log.error("ERROR. Could not open {0} message: {1}".format(url, e))
             irc.reply("ERROR. Could not open {0} message: {1}".format(url, e))
@@ -1194,7 +1621,8 @@ class Scores(callbacks.Plugin):
             irc.reply("Sorry, but no games are scheduled today.")
             return
         # process html
-        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
+        with self.timings.phase('parse'):
+            soup = sports.module('parsers').page(html)
         tables = soup.findAll('table', attrs={'style':'table-layout:fixed'}) #[1:]
         # output list.
         d1games = []
@@ -1235,6 +1663,9 @@ class Scores(callbacks.Plugin):
                     # add score and format status using mlbhandler above.
                     gamestr = "{0} {1}".format(gamescore, self._handlestatus('mlb', status))
                     gamesort = 2  # display these second.
+                    if self.archive and status.upper().startswith('F'):  # final. keep it.
+                        (awayname, homename) = (awayteam.getText().replace('&amp;', '&'), hometeam.getText().replace('&amp;', '&'))  # without the ranks.
+                        self.archive.add('d1bb', datetime.date.today().strftime('%Y%m%d'), awayname, homename, awayscore, homescore, status, within=1)  # the page may still be up after midnight.
                 d1games.append({'gamestr':gamestr, 'gamesort':gamesort})  # finally, add.
         # now output.
         if optinput:  # if we're searching for a team.
@@ -1247,9 +1678,8 @@ class Scores(callbacks.Plugin):
                     else:  # max found so print error and break.
                         irc.reply("Sorry, too many matches found for '{0}'. Please be more specific.".format(optinput))
                         break
-        else:  # just display scores in one row. listcmp the games into a string.
-            output = " | ".join([item['gamestr'] for item in sorted(d1games, key=lambda k: k['gamesort'], reverse=True)])
-            irc.reply("{0}".format(output))
+        else:  # just display scores. as many per line as fit, the rest to more.
+            self._replylines(irc, msg, [item['gamestr'] for item in sorted(d1games, key=lambda k: k['gamesort'], reverse=True)])
 
     d1bb = wrap(d1bb, [optional('text')])
 
@@ -1260,14 +1690,16 @@ class Scores(callbacks.Plugin):
 
         try:
             url = b64decode('aHR0cDovL20udHNuLmNhL2NmbA==')
-            html = utils.web.getUrl(url)
+            html = self._geturl(url, 'cfl')
         except utils.web.Error as e:
             self.log.error("ERROR. Could not open {0} message: {1}".format(url, e))
             irc.reply("ERROR. Could not open {0} message: {1}".format(url, e))
             return
         # process html.
-        soup = BeautifulSoup(html, convertEntities=BeautifulSoup.HTML_ENTITIES, fromEncoding='utf-8')
+        with self.timings.phase('parse'):
+            soup = sports.module('parsers').page(html)
         divs = soup.findAll('div', attrs={'id':re.compile('^\d+_score.*?')})
+        cflgames = []
         for div in divs:
             # handle status
             status = div.find('div', attrs={'class':'gameSummary'}).getText().strip()
@@ -1282,13 +1714,250 @@ class Scores(callbacks.Plugin):
             # bold leader.
             if (awayscore.isdigit() and homescore.isdigit()):  # make sure they're digits.
                 gamescore = self._boldleader(at, awayscore, ht, homescore)
+                if self.archive and status.upper().startswith('F'):  # final. keep it.
+                    self.archive.add('cfl', datetime.date.today().strftime('%Y%m%d'), at, ht, awayscore, homescore, status, within=7)  # the page is the whole week, without dates.
             else:  # if not (in the future).
                 gamescore = "{0} {1} {2} {3}".format(at, awayscore, ht, homescore)
-            # output.
-            irc.reply("{0} {1}".format(gamescore, status))
+            cflgames.append("{0} {1}".format(gamescore, status))
+        # output. as many per line as fit, or line-by-line.
+        self._replylines(irc, msg, cflgames)
 
     cfl = wrap(cfl)
 
+    def scores(self, irc, msg, args, optteam):
+        """[team]
+
+        Display an overview of today's NBA, NHL, MLB, NFL, CFB, NCB, NCW and WNBA games.
+        With team, display its games in every one of them. Ex: boston
+        """
+
+        # fetch every board at once. top 25 for the overview, the widest boards when looking for a team.
+        started, futures = time.time(), []
+        for sport in OVERVIEWSPORTS:
+            futures.append((sport, self.overviewpool.submit(self._board, REFRESHBOARDS[sport][-1 if optteam else 0], sport)))
+        # each sport gets overview.deadline seconds from when its fetch starts. the ones that miss it are left out,
+        # and so are the ones still queued after twice that (a busy pool), which we then drop.
+        deadline, boards, missing = self.registryValue('overview.deadline'), {}, []
+        with self.timings.phase('fetch'):
+            for (sport, future) in futures:
+                if not future.begun(max(0, started + 2 * deadline - time.time())) and future.cancel():
+                    missing.append("{0} (not fetched)".format(sports.SPORTS[sport].label))
+                elif not future.wait(max(0, future.started + deadline - time.time())):
+                    missing.append("{0} (timed out)".format(sports.SPORTS[sport].label))
+                elif future.result is None:
+                    missing.append("{0} (failed)".format(sports.SPORTS[sport].label))
+                else:
+                    boards[sport] = future.result
+        fullteams, ansi = self.registryValue('fullteams', msg.args[0]), not self.registryValue('disableANSI', msg.args[0])
+        output = []
+        for sport in OVERVIEWSPORTS:
+            if sport not in boards:
+                continue
+            label = sports.SPORTS[sport].label
+            if boards[sport].stale:
+                label += " (stale)"
+            games = boards[sport].games
+            if optteam:  # every game of team, as the sport's own command displays it.
+                lines = self._renderboard(boards[sport], sport='ncb' if sport == 'ncw' else sport, fullteams=fullteams, ansi=ansi)
+                output.extend(["{0}: {1}".format(label, line) for line in self._matchgames(sport, optteam, games, lines)])
+            else:  # how many games are live, final and later.
+                counts = [(len([g for g in games if g.state == state]), name) for (state, name) in (('in', 'live'), ('post', 'final'), ('pre', 'later'))]
+                summary = ", ".join(["{0} {1}".format(count, name) for (count, name) in counts if count]) or "no games"
+                output.append("{0}: {1}".format(self._bold(label) if ansi else label, summary))
+        if optteam and not output:
+            output.append("No games found for '{0}'.".format(optteam))
+        if missing:
+            output.append("Left out: {0}".format(", ".join(missing)))
+        self._replylines(irc, msg, output)
+
+    scores = wrap(scores, [optional('text')])
+
+    ###########
+    # WATCHES #
+    ###########
+
+    def _watchtick(self):
+        """Scheduled every REFRESHTICK seconds. Polls the watched boards every watch.interval seconds."""
+
+        now = time.time()
+        with self.watchlock:
+            if self.watchbusy or now < self.watchnext or not self.watchlist.sports():
+                return
+            self.watchbusy, self.watchnext = True, now + self.registryValue('watch.interval')
+        # poll in the background so we don't block the bot.
+        t = threading.Thread(target=self._watchpoll, name='Thread #%s (Scores watcher)' % world.threadsSpawned)
+        world.threadsSpawned += 1
+        t.setDaemon(True)
+        t.start()
+
+    def _watchpoll(self):
+        """Fetch each watched board once, diff it against the last poll and announce what changed."""
+
+        try:
+            polled = {}
+            for sport in self.watchlist.sports():
+                # resolve each watched team once per poll.
+                watchers = [(network, channel, self._findteams(sport, team)) for (network, channel, team) in self.watchlist.watchers(sport)]
+                announced = set()  # games of sport announced this poll.
+                for url in REFRESHBOARDS[sport]:
+                    board = self._board(url, sport)  # warm boards and cached pages count as the poll.
+                    if board is None:
+                        if url in self.watchboards:  # keep the last snapshot until it's back.
+                            polled[url] = self.watchboards[url]
+                        continue
+                    polled[url] = board
+                    previous = self.watchboards.get(url)
+                    if previous is None or previous is board:  # first poll or same page.
+                        continue
+                    for (game, changes) in watch.diff(previous.games, board.games):
+                        if watch.gamekey(game) in announced:  # on the top 25 board and the widest one.
+                            continue
+                        announced.add(watch.gamekey(game))
+                        # once per channel, even if it watches both teams (or two names of one).
+                        for (network, channel) in sorted(set([(n, c) for (n, c, abbrs) in watchers if game.involves(abbrs)])):
+                            self._watchannounce(network, channel, sport, game, changes)
+            # boards nobody watches anymore start from scratch if they're watched again.
+            self.watchboards = polled
+        finally:
+            with self.watchlock:
+                self.watchbusy = False
+
+    def _watchannounce(self, network, channel, sport, game, changes):
+        """Announce the changes of game in channel if we're on network and in it."""
+
+        for irc in world.ircs:
+            if irc.network != network or channel not in irc.state.channels:
+                continue
+            line = self._rendergame(game, sport='ncb' if sport == 'ncw' else sport, fullteams=self.registryValue('fullteams', channel), ansi=not self.registryValue('disableANSI', channel))
+            irc.queueMsg(ircmsgs.privmsg(channel, "{0}: {1} ({2})".format(sport.upper(), line, ", ".join([WATCHCHANGES[c] for c in changes]))))
+
+    def watch(self, irc, msg, args, channel, optsport, optteam):
+        """[<channel>] <sport> <team>
+
+        Announce score, period, red zone and final changes of team's games in channel.
+        Team is an abbreviation, nickname or name. Ex: nfl pats or nba knicks
+        """
+
+        optsport = WATCHSPORTS.get(optsport.lower())
+        if not optsport:
+            irc.reply("ERROR: I can only watch: {0}".format(" | ".join(sorted(WATCHSPORTS))))
+            return
+        if not self._findteams(optsport, optteam):
+            irc.reply("ERROR: I don't know a {0} team '{1}'.".format(optsport.upper(), optteam))
+            return
+        if self.watchlist.add(irc.network, channel, optsport, optteam):
+            irc.reply("Watching {0} {1} in {2}. Changes are checked every {3}s.".format(optsport.upper(), optteam, channel, self.registryValue('watch.interval')))
+        else:
+            irc.reply("I'm already watching {0} {1} in {2}.".format(optsport.upper(), optteam, channel))
+
+    watch = wrap(watch, ['op', 'somethingWithoutSpaces', 'text'])
+
+    def unwatch(self, irc, msg, args, channel, optsport, optteam):
+        """[<channel>] <sport> <team>
+
+        Stop watching team in channel.
+        """
+
+        optsport = WATCHSPORTS.get(optsport.lower(), optsport.lower())
+        if self.watchlist.remove(irc.network, channel, optsport, optteam):
+            irc.reply("Stopped watching {0} {1} in {2}.".format(optsport.upper(), optteam, channel))
+        else:
+            irc.reply("ERROR: I'm not watching {0} {1} in {2}.".format(optsport.upper(), optteam, channel))
+
+    unwatch = wrap(unwatch, ['op', 'somethingWithoutSpaces', 'text'])
+
+    def watches(self, irc, msg, args, channel):
+        """[<channel>]
+
+        List the teams watched in channel.
+        """
+
+        watches = self.watchlist.channel(irc.network, channel)
+        if not watches:
+            irc.reply("Nothing is watched in {0}.".format(channel))
+            return
+        irc.reply("Watching in {0}: {1}".format(channel, " | ".join(["{0} {1}".format(s.upper(), t) for (s, t) in watches])))
+
+    watches = wrap(watches, ['channel'])
+
+    ##################
+    # ADMIN COMMANDS #
+    ##################
+
+    def cache(self, irc, msg, args, optflush):
+        """[flush]
+
+        Display hit rate and size of the upstream response cache.
+        Use flush to empty it.
+        """
+
+        if optflush:  # empty the cache.
+            count = self.responsecache.flush()
+            self.boards.flush()
+            irc.reply("Flushed {0} entries from the response cache.".format(count))
+            return
+        # otherwise, display stats.
+        stats, flight = self.responsecache.stats(), self.inflight.stats()
+        irc.reply("Response cache: {0} entries using {1}/{2} bytes. {3} hits, {4} misses ({5:.1f}% hit rate). {6} revalidated (304). {7} evictions. {8} coalesced callers (avg wait {9:.0f}ms, max {10:.0f}ms).".format(
+                  stats['entries'], stats['size'], stats['maxbytes'], stats['hits'], stats['misses'], stats['hitrate'], stats['revalidations'], stats['evictions'],
+                  flight['coalesced'], flight['avgwait'] * 1000, flight['maxwait'] * 1000))
+
+    cache = wrap(cache, ['admin', optional(('literal', 'flush'))])
+
+    def stats(self, irc, msg, args, optsport):
+        """[sport|reset|load]
+
+        Display p50/p95/p99 times (ms) of each phase of the last commands per sport.
+        Give a sport to only display it. Use reset to clear them and load for how long loading the plugin took.
+        """
+
+        if optsport == 'reset':  # start over.
+            self.timings.reset()
+            irc.reply("Reset command timings.")
+            return
+        if optsport == 'load':  # (re)load, and the modules imported on first use since.
+            lazy = sorted(sports.loaded().items())
+            irc.reply("Loaded in {0:.0f}ms (modules {1:.0f}ms, init {2:.0f}ms). Imported on first use: {3}".format(sum(self.loadtimes.values()) * 1000,
+                      self.loadtimes['modules'] * 1000, self.loadtimes['init'] * 1000, " | ".join(["{0} {1:.0f}ms".format(name, seconds * 1000) for (name, seconds) in lazy]) or "nothing yet"))
+            return
+        summary = self.timings.summary()
+        if optsport:
+            optsport = optsport.lower()
+            if optsport not in summary:
+                irc.reply("No timings for {0}. I have: {1}".format(optsport, " | ".join(sorted(summary)) or "none"))
+                return
+            summary = {optsport: summary[optsport]}
+        if not summary:
+            irc.reply("No commands timed yet.")
+            return
+        # one line per sport. phases in the order a command runs them.
+        for (sport, phases) in sorted(summary.items()):
+            output = []
+            for phase in ('total', 'fetch', 'parse', 'teams', 'format', 'reply', 'other'):
+                if phase in phases:
+                    (count, p50, p95, p99) = phases[phase]
+                    output.append("{0} {1:.1f}/{2:.1f}/{3:.1f}".format(phase, p50 * 1000, p95 * 1000, p99 * 1000))
+            irc.reply("{0} ({1} runs, p50/p95/p99 ms): {2}".format(self._bold(sport), phases['total'][0], " | ".join(output)))
+
+    stats = wrap(stats, ['owner', optional('somethingWithoutSpaces')])
+
+    def reloadteams(self, irc, msg, args):
+        """takes no arguments
+
+        Reload full team names from the database.
+        Rebuilds db/scores.db first if db/scores.sql is newer.
+        """
+
+        # grab the most frequent missing teams before the reload resets them.
+        missing = sorted(self.missingteams.items(), key=lambda x: x[1], reverse=True)
+        count = self._loadteams()
+        self.boards.flushrendered()  # full team names may have changed.
+        irc.reply("Loaded {0} teams for {1} sports.".format(count, len(self.teams)))
+        if missing:  # show what we were missing since the last load.
+            irc.reply("Missing since last load: {0}".format(", ".join(["{0}/{1} ({2})".format(s, t, c) for ((s, t), c) in missing[0:10]])))
+
+    reloadteams = wrap(reloadteams, ['admin'])
+
 Class = Scores
 
 # vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
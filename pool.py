@@ -0,0 +1,112 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import time
+import Queue
+import threading
+# supybot libs
+import supybot.log as log
+
+
+class Future(object):
+    """Result of a call submitted to a Pool. started is when a thread
+    picked the call up, None while it's queued.
+    """
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.started = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Wait up to timeout seconds for the call. Returns True if it finished."""
+
+        self._done.wait(timeout)
+        return self._done.isSet()
+
+    def begun(self, timeout=None):
+        """Wait up to timeout seconds for the call to start. Returns True if it has."""
+
+        self._running.wait(timeout)
+        return self._running.isSet()
+
+    def cancel(self):
+        """Drop the call if it hasn't started. Returns True if it won't run."""
+
+        with self._lock:
+            if self.started is None:
+                self.cancelled = True
+            return self.cancelled
+
+    def _start(self):
+        """Called by the pool. Returns False if the call was cancelled."""
+
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.started = time.time()
+        self._running.set()
+        return True
+
+
+class Pool(object):
+    """At most size daemon threads running submitted calls in order.
+
+    Threads are started as work comes in and then stay for the next
+    call, so a command fanning out to many boards never runs more than
+    size fetches at once, however many sports or users ask. A call
+    nobody waits for anymore still finishes and warms the caches.
+    """
+
+    def __init__(self, size, name='Scores pool'):
+        self.size = size
+        self.name = name
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, f, *args, **kwargs):
+        """Run f(*args, **kwargs) in the pool and return its Future."""
+
+        future = Future()
+        self._queue.put((future, f, args, kwargs))
+        with self._lock:
+            self._threads = [t for t in self._threads if t.isAlive()]
+            if len(self._threads) < self.size:
+                t = threading.Thread(target=self._work, name='{0} #{1}'.format(self.name, len(self._threads) + 1))
+                t.setDaemon(True)
+                t.start()
+                self._threads.append(t)
+        return future
+
+    def _work(self):
+        while True:
+            work = self._queue.get()
+            if work is None:  # close().
+                return
+            (future, f, args, kwargs) = work
+            if not future._start():  # nobody wants it anymore.
+                future._done.set()
+                continue
+            try:
+                future.result = f(*args, **kwargs)
+            except Exception as e:  # callers only see it failed. the traceback is here.
+                log.exception("{0}: {1} failed.".format(self.name, getattr(f, '__name__', f)))
+                future.error = e
+            future._done.set()
+
+    def close(self):
+        """Stop the threads once the work queued so far is done."""
+
+        with self._lock:
+            for t in self._threads:
+                self._queue.put(None)
+            self._threads = []
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
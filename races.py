@@ -0,0 +1,102 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import threading
+from collections import deque
+
+# the series nascar and racing show: {name on the command line: (command, url)}.
+SERIES = {'sprintcup': ('nascar', 'rpm/nascar/eventresult?seriesId=2'),
+          'nationwide': ('nascar', 'rpm/nascar/eventresult?seriesId=3'),
+          'trucks': ('nascar', 'rpm/nascar/eventresult?seriesId=4'),
+          'f1': ('racing', 'rpm/eventresult?season=-1&seriesId=6'),
+          'indycar': ('racing', 'rpm/eventresult?season=-1&seriesId=1')}
+
+
+class Race(object):
+    """A parsed race results page. rows are (position, driver, behind) as
+    upstream sent them, driver utf-8 encoded. behind is None if the page
+    doesn't have it (racing).
+    """
+
+    __slots__ = ('name', 'status', 'rows')
+
+    def __init__(self, name, status, rows):
+        self.name = name
+        self.status = status
+        self.rows = rows
+
+    def live(self):
+        return bool(self.rows) and 'Final' not in self.status
+
+
+class Track(object):
+    """Position history of one race.
+
+    Every driver has a ring buffer (deque with a maxlen) of their last
+    size (snapshot, position) pairs, so a race of any length holds at most
+    size snapshots per driver. A driver who drops off the page just stops
+    getting new ones.
+    """
+
+    __slots__ = ('race', 'status', 'snapshots', 'drivers')
+
+    def __init__(self, race):
+        self.race = race
+        self.status = None
+        self.snapshots = 0  # taken since the race started. the number of the newest.
+        self.drivers = {}  # driver: deque([(snapshot, position), ...]), newest last.
+
+
+class Tracker(object):
+    """Position snapshots of the races we've seen, one Track per url.
+    A new race on a url replaces the old one.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.tracks = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, race):
+        """Take a snapshot of race unless its status (the lap) is the one we
+        took last. Returns True if we took one.
+        """
+
+        with self._lock:
+            track = self.tracks.get(key)
+            if track is None or track.race != race.name:  # first look or the next race.
+                track = self.tracks[key] = Track(race.name)
+            if race.status == track.status or not race.rows:
+                return False
+            track.status = race.status
+            track.snapshots += 1
+            for (position, driver, behind) in race.rows:
+                if position.isdigit():
+                    track.drivers.setdefault(driver, deque(maxlen=self.size)).append((track.snapshots, int(position)))
+            return True
+
+    def movers(self, key, polls):
+        """Return (snapshots held, [(driver, places gained, position now)])
+        over the last polls snapshots of key's race, biggest change first.
+        Drivers who didn't move are left out. (0, []) if we have none.
+        """
+
+        with self._lock:
+            track = self.tracks.get(key)
+            if not track or not track.snapshots:
+                return (0, [])
+            since = track.snapshots - polls
+            moved = []
+            for (driver, positions) in track.drivers.items():
+                (snapshot, now) = positions[-1]
+                if snapshot != track.snapshots:  # not on the page anymore.
+                    continue
+                then = [position for (taken, position) in positions if taken >= since][0]
+                if then != now:
+                    moved.append((driver, then - now, now))
+            held = min(track.snapshots, self.size)
+        return (held, sorted(moved, key=lambda m: (-abs(m[1]), m[2])))
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
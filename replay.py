@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+"""Record/replay of upstream pages.
+
+With plugins.Scores.record.enabled on, every page the plugin fetches is
+saved to a Store. Run this file on a recording to serve it back through
+a local stand-in for upstream, then point plugins.Scores.http.proxy at
+it. Ex: python replay.py ~/bot/data/ScoresRecordings --speed 10
+"""
+
+import os
+import sys
+import time
+import gzip
+import urllib
+import hashlib
+import argparse
+import threading
+import SocketServer
+import BaseHTTPServer
+from cStringIO import StringIO
+
+
+class Store(object):
+    """Content-addressed store of upstream pages on disk.
+
+    Each distinct body is kept once, gzipped, under objects/ by its sha1.
+    index has one line per fetch: time, sha1 and url, so the same page
+    fetched all afternoon costs one blob and a line per fetch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.isdir(os.path.join(path, 'objects')):
+            os.makedirs(os.path.join(path, 'objects'))
+
+    def _blob(self, sha):
+        return os.path.join(self.path, 'objects', sha[:2], sha + '.gz')
+
+    def put(self, url, body, when=None):
+        """Record that url returned body at when (now). Returns the sha1 of body."""
+
+        sha = hashlib.sha1(body).hexdigest()
+        blob = self._blob(sha)
+        with self._lock:
+            if not os.path.exists(blob):  # new content. write it whole then move it in place.
+                if not os.path.isdir(os.path.dirname(blob)):
+                    os.makedirs(os.path.dirname(blob))
+                f = gzip.open(blob + '.tmp', 'wb')
+                f.write(body)
+                f.close()
+                os.rename(blob + '.tmp', blob)
+            with open(os.path.join(self.path, 'index'), 'a') as f:
+                f.write("{0:.3f}\t{1}\t{2}\n".format(when or time.time(), sha, url))
+        return sha
+
+    def get(self, sha, compressed=False):
+        """Return the body with sha1 sha, gzipped if compressed."""
+
+        with open(self._blob(sha), 'rb') as f:
+            data = f.read()
+        if compressed:
+            return data
+        return gzip.GzipFile(fileobj=StringIO(data)).read()
+
+    def index(self):
+        """Return {url: [(time, sha1), ...]} with each list in time order."""
+
+        recordings = {}
+        path = os.path.join(self.path, 'index')
+        if not os.path.exists(path):
+            return recordings
+        with open(path) as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) != 3:  # half written line from a crash.
+                    continue
+                recordings.setdefault(parts[2], []).append((float(parts[0]), parts[1]))
+        for fetches in recordings.values():
+            fetches.sort()
+        return recordings
+
+
+def lookup(fetches, when):
+    """Return the sha1 of the last of fetches at or before when. Before the first, the first."""
+
+    found = fetches[0][1]
+    for (fetched, sha) in fetches:
+        if fetched > when:
+            break
+        found = sha
+    return found
+
+
+class Clock(object):
+    """Replay time. Starts at start and runs speed times faster than real time (0 stops it)."""
+
+    def __init__(self, start, speed=1.0):
+        self.start = start
+        self.speed = speed
+        self.began = time.time()
+
+    def now(self):
+        return self.start + (time.time() - self.began) * self.speed
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        standin = self.server.standin
+        if self.path.startswith('http'):  # asked as a proxy.
+            url = self.path
+        else:  # asked directly: /http://host/path
+            url = urllib.unquote(self.path[1:])
+        sha = standin.find(url)
+        if not sha:
+            standin.count('notfound')
+            return self._send(404, 'not recorded: ' + url)
+        etag = '"{0}"'.format(sha)
+        if self.headers.get('If-None-Match') == etag:
+            standin.count('notmodified')
+            return self._send(304, '', {'ETag': etag})
+        standin.count('served')
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            return self._send(200, standin.store.get(sha, compressed=True), {'ETag': etag, 'Content-Encoding': 'gzip'})
+        self._send(200, standin.store.get(sha), {'ETag': etag})
+
+    def _send(self, status, body, headers={}):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for (k, v) in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # quiet.
+        pass
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StandIn(object):
+    """Local HTTP server that answers for upstream from a Store.
+
+    Works as an HTTP proxy (plugins.Scores.http.proxy) or directly as
+    http://host:port/<url>. Each url is answered with what upstream sent
+    last at the clock's time, with the sha1 as ETag so conditional GETs
+    get a 304 until the recording changes.
+    """
+
+    def __init__(self, store, clock, host='127.0.0.1', port=8080):
+        self.store = store
+        self.clock = clock
+        self.recordings = store.index()
+        self.counts = {'served': 0, 'notmodified': 0, 'notfound': 0}
+        self._lock = threading.Lock()
+        self.server = _Server((host, port), _Handler)
+        self.server.standin = self
+        self.address = self.server.server_address
+        self._thread = None
+
+    def find(self, url):
+        fetches = self.recordings.get(url)
+        if not fetches:
+            return None
+        return lookup(fetches, self.clock.now())
+
+    def count(self, what):
+        with self._lock:
+            self.counts[what] += 1
+
+    def start(self):
+        """Serve in a background thread."""
+
+        self._thread = threading.Thread(target=self.server.serve_forever, name='Scores replay stand-in')
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Serve a Scores recording as a local stand-in for upstream.")
+    parser.add_argument('directory', help="recording directory (plugins.Scores.record.directory)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--start', type=float, default=None, help="replay clock start as a unix time. default: first recording.")
+    parser.add_argument('--speed', type=float, default=1.0, help="playback speed. 60 plays an hour a minute, 0 stops the clock.")
+    args = parser.parse_args(argv)
+    store = Store(args.directory)
+    recordings = store.index()
+    if not recordings:
+        sys.exit("Nothing recorded in {0}".format(args.directory))
+    first = min([fetches[0][0] for fetches in recordings.values()])
+    last = max([fetches[-1][0] for fetches in recordings.values()])
+    standin = StandIn(store, Clock(args.start or first, args.speed), args.host, args.port)
+    print "Replaying {0} urls recorded {1} to {2} at {3}x on http://{4}:{5}/".format(len(recordings), time.ctime(first), time.ctime(last), args.speed, *standin.address)
+    print "Set plugins.Scores.http.proxy to http://{0}:{1} and go. Ctrl-C to stop.".format(*standin.address)
+    started = time.time()
+    standin.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    standin.stop()
+    elapsed = time.time() - started
+    total = sum(standin.counts.values())
+    print "{0} requests in {1:.0f}s ({2:.1f}/s): {3[served]} served, {3[notmodified]} not modified, {3[notfound]} not recorded.".format(total, elapsed, total / elapsed if elapsed else 0, standin.counts)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,93 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import re
+
+# splits a team token into possession marker (*), team and (rank).
+TOKENREGEX = re.compile(r'(?P<pre>\*)?(?P<team>[A-Z\-&;]+)(?:\((?P<rank>\d+)\))?')
+
+# one copy of each team string no matter how many boards we hold. statuses
+# (clocks) change every poll, so they aren't kept here or this would only grow.
+_strings = {}
+
+
+def _intern(s):
+    """intern() for str and unicode alike."""
+
+    return _strings.setdefault(s, s)
+
+
+class Game(object):
+    """One game from a scoreboard.
+
+    away/home and the scores/status are kept exactly as upstream sent them
+    so rendering is unchanged. The rest is parsed out of them:
+    state is pre, in or post. period is the last part of status (4th, Half,
+    F/OT). possession is away, home or None and redzone is True when the
+    team with the ball is in the red zone (NFL/NCF only). poff is the
+    playoff note. gameid is upstream's id of the game (its block's id), None
+    for games we didn't parse off a page.
+    """
+
+    __slots__ = ('state', 'away', 'home', 'awayabbr', 'homeabbr', 'awayrank', 'homerank',
+                 'awayscore', 'homescore', 'status', 'period', 'possession', 'redzone', 'poff', 'gameid')
+
+    def __init__(self, state, away, home, awayscore=None, homescore=None, status=None, poff=None, redzone=False, gameid=None):
+        self.state = state
+        self.away = _intern(away)
+        self.home = _intern(home)
+        (self.awayabbr, self.awayrank) = _splitteam(self.away)
+        (self.homeabbr, self.homerank) = _splitteam(self.home)
+        self.awayscore = awayscore
+        self.homescore = homescore
+        self.status = status
+        self.period = status.split(' ', 1)[-1] if status and state != 'pre' else None
+        self.possession = 'away' if '*' in away else 'home' if '*' in home else None
+        self.redzone = redzone
+        self.poff = poff
+        self.gameid = gameid
+
+    def teams(self):
+        """Return (awayabbr, homeabbr)."""
+
+        return (self.awayabbr, self.homeabbr)
+
+    def involves(self, abbrs):
+        """Is either team one of abbrs?"""
+
+        return self.awayabbr in abbrs or self.homeabbr in abbrs
+
+
+def _splitteam(token):
+    """Return (abbreviation, rank) for a team token like *BAMA(1)."""
+
+    m = TOKENREGEX.search(token)
+    if not m:
+        return (token, None)
+    return (_intern(m.group('team')), m.group('rank') and int(m.group('rank')))
+
+
+def parsegame(gametext, poff=None, redzone=False, gameid=None):
+    """Turn the text of a game (score part of _splitevent) into a Game.
+    Returns None if the text does not look like a game.
+    """
+
+    if " at " in gametext:  # TEAM at TEAM time for inactive games.
+        gparts = gametext.split(" ", 3)
+        if len(gparts) < 4:
+            return None
+        return Game('pre', gparts[0].replace('&amp;', '&'), gparts[2].replace('&amp;', '&'), status=gparts[3], poff=poff, gameid=gameid)
+    # in-action or final. AWAY ASCORE HOME HSCORE status.
+    gparts = gametext.split(" ", 4)
+    if len(gparts) < 5:
+        return None
+    status = gparts[4].split(',')[0]
+    if status.startswith('F') or status.startswith('Canc'):  # Final, F/OT, F/10, Canc.
+        state = 'post'
+    else:
+        state = 'in'
+    return Game(state, gparts[0].replace('&amp;', '&'), gparts[2].replace('&amp;', '&'), awayscore=gparts[1], homescore=gparts[3], status=status, poff=poff, redzone=redzone, gameid=gameid)
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,75 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import time
+import threading
+
+
+class _Call(object):
+    """An in-flight call and what it returned (or raised)."""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalesce concurrent calls for the same key.
+
+    The first thread to ask for a key runs the function. Every thread that
+    asks for the same key while that is running waits and gets the same
+    result (or exception) instead of doing the work again.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self.waittime = 0.0
+        self.maxwait = 0.0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, f, *args, **kwargs):
+        """Return f(*args, **kwargs), sharing the call with concurrent callers of key."""
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+        if not leader:  # someone is already on it. wait for them.
+            start = time.time()
+            call.event.wait()
+            waited = time.time() - start
+            with self._lock:
+                self.coalesced += 1
+                self.waittime += waited
+                self.maxwait = max(self.maxwait, waited)
+            if call.error:
+                raise call.error
+            return call.result
+        try:
+            call.result = f(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self):
+        """Return a dict of counters for display."""
+
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'maxwait': self.maxwait,
+                    'avgwait': (self.waittime / self.coalesced) if self.coalesced else 0.0}
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
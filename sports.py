@@ -0,0 +1,102 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import sys
+import time
+import threading
+
+# football confs. translates text to groupid for lookup.
+NCFCONFS = {'top25':'999', 'acc':'1', 'aac':'151', 'big12':'4', 'bigsky':'20', 'bigsouth':'40',
+            'big10':'5', 'cusa':'12', 'caa':'48', 'independent':'32', 'greatwest':'43',
+            'ivy':'22', 'mac':'15', 'meac':'24', 'mvc':'21', 'mwc':'17', 'i-a':'80', 'i-aa':'81',
+            'nec':'25', 'ovc':'26', 'pac12':'9', 'patriot':'27', 'pioneer':'28', 'sec':'8',
+            'southern':'29', 'southland':'30', 'sunbelt':'37', 'swac':'31' }
+# basketball confs.
+NCBCONFS = {'top25':'999', 'a10':'3', 'acc':'2', 'ameast':'1', 'big12':'8', 'bigeast':'4', 'bigsky':'5', 'bigsouth':'6', 'big10':'7',
+            'bigwest':'9', 'c-usa':'11', 'caa':'10', 'greatwest':'57', 'horizon':'45', 'independent':'43', 'ivy':'12', 'maac':'13',
+            'mac':'14', 'meac':'16', 'mvc':'18', 'mwc':'44', 'div-i':'50', 'nec':'19', 'non-div-i':'51', 'ovc':'20', 'pac12':'21',
+            'patriot':'22', 'sec':'23', 'southern':'24', 'southland':'25', 'summit':'49', 'sunbelt':'27', 'swac':'26', 'wac':'30',
+            'wcc':'29', 'ncaa':'100', 'nit':'50', 'cbi':'55', 'cit':'56' }
+# women's basketball has no cit.
+NCWCONFS = dict([(conf, group) for (conf, group) in NCBCONFS.items() if conf != 'cit'])
+
+
+class Sport(object):
+    """What the commands need to know about one scoreboard sport.
+
+    url is the board without a date or group. confs maps conference names
+    to groupIds, with boards the [top25, widest] of them for the refresher
+    and team searches. render is the sport games are rendered and teams
+    looked up as. ranges is True if the command takes --from/--to.
+    """
+
+    __slots__ = ('name', 'label', 'url', 'confs', 'boards', 'render', 'ranges')
+
+    def __init__(self, name, label, confs=None, top='top25', wide=None, render=None, ranges=False):
+        self.name = name
+        self.label = label
+        self.url = '{0}/scoreboard?'.format(name)
+        self.confs = confs
+        self.boards = ['{0}groupId={1}'.format(self.url, confs[c]) for c in (top, wide)] if confs else [self.url]
+        self.render = render or name
+        self.ranges = ranges
+
+    def board(self, conf):
+        """Return the url of conf's board."""
+
+        return '{0}groupId={1}'.format(self.url, self.confs[conf])
+
+
+SPORTS = dict([(s.name, s) for s in (
+    Sport('nba', 'NBA', ranges=True),
+    Sport('wnba', 'WNBA'),
+    Sport('nhl', 'NHL', ranges=True),
+    Sport('mlb', 'MLB', ranges=True),
+    Sport('nfl', 'NFL'),
+    Sport('ncf', 'CFB', NCFCONFS, wide='i-a'),
+    Sport('ncb', 'NCB', NCBCONFS, wide='div-i', ranges=True),
+    Sport('ncw', 'NCW', NCWCONFS, wide='div-i', render='ncb'))])
+
+# modules imported on first use instead of when the plugin loads. {name: seconds it took}
+_loaded = {}
+_lock = threading.Lock()
+
+
+def _qualified(name):
+    return '{0}.{1}'.format(__name__.rpartition('.')[0], name).lstrip('.')
+
+
+def module(name):
+    """Return the plugin's module name (ex: parsers), importing it the first
+    time it's asked for since we were (re)loaded. That always imports the
+    code on disk, so reloading the plugin doesn't have to.
+    """
+
+    if name in _loaded:
+        return sys.modules[_qualified(name)]
+    with _lock:
+        if name not in _loaded:
+            started = time.time()
+            sys.modules.pop(_qualified(name), None)  # the copy from before a reload.
+            __import__(_qualified(name))
+            _loaded[name] = time.time() - started
+    return sys.modules[_qualified(name)]
+
+
+def loaded():
+    """Return {name: seconds} of the modules imported through module() so far."""
+
+    return dict(_loaded)
+
+
+def unload():
+    """Forget the modules imported through module() so the next use imports them again."""
+
+    with _lock:
+        for name in _loaded.keys():
+            sys.modules.pop(_qualified(name), None)
+        _loaded.clear()
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,69 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import re
+
+# words of a team name or query. A&M and St. stay whole.
+WORDREGEX = re.compile(r"[a-z0-9&'\.\-]+")
+# length of the n-grams for part-of-a-name lookups.
+NGRAM = 3
+
+
+def normalize(s):
+    """Lowercase s and keep only its words, single spaced."""
+
+    return " ".join(WORDREGEX.findall(s.lower()))
+
+
+def _ngrams(s):
+    return set([s[i:i + NGRAM] for i in range(len(s) - NGRAM + 1)])
+
+
+class TeamIndex(object):
+    """Search index of one sport's teams.
+
+    Built once from {short: full} and {alias: [short, ...]} so a query is
+    resolved to abbreviations up front instead of scanning every output
+    line. lookup() tries, in order: an alias (bama, the u), an abbreviation,
+    and whole words of the full name (knicks, new york). If none of those
+    match, it looks for the query inside the full names, narrowed down
+    through an n-gram index first so the ~700 NCAA teams aren't all scanned.
+    """
+
+    def __init__(self, teams, aliases=None):
+        self.abbrs = {}  # lowercased abbreviation: abbreviation.
+        self.names = {}  # abbreviation: normalized full name.
+        self.words = {}  # word of a full name: set of abbreviations.
+        self.aliases = {}  # normalized alias: set of abbreviations.
+        self.grams = {}  # n-gram of a full name: set of abbreviations.
+        for (short, full) in teams.items():
+            self.abbrs[short.lower()] = short
+            name = self.names[short] = normalize(full)
+            for word in name.split():
+                self.words.setdefault(word, set()).add(short)
+            for gram in _ngrams(name):
+                self.grams.setdefault(gram, set()).add(short)
+        for (alias, shorts) in (aliases or {}).items():
+            self.aliases.setdefault(normalize(alias), set()).update(shorts)
+
+    def lookup(self, query):
+        """Return the set of abbreviations query stands for. Empty if none."""
+
+        query = normalize(query)
+        if not query:
+            return set()
+        found = set(self.aliases.get(query, ()))
+        if query in self.abbrs:
+            found.add(self.abbrs[query])
+        words = [self.words.get(word) for word in query.split()]
+        if all(words):  # every word of the query is a word of the name.
+            found.update(set.intersection(*words))
+        if found or len(query) < NGRAM:
+            return found
+        # part of a name. only names with every n-gram of the query can hold it.
+        candidates = set.intersection(*[self.grams.get(gram, set()) for gram in _ngrams(query)])
+        return set([short for short in candidates if query in self.names[short]])
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
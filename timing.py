@@ -0,0 +1,158 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class Histogram(object):
+    """Rolling window of the last size samples (seconds). count and sum
+    are of every sample ever added.
+    """
+
+    def __init__(self, size):
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=size)
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentiles(self, *ps):
+        """Return the nearest-rank percentiles ps (0-100) of the window."""
+
+        samples = sorted(self.samples)
+        if not samples:
+            return [0.0 for p in ps]
+        return [samples[min(len(samples) - 1, int(len(samples) * p / 100.0))] for p in ps]
+
+
+class Timer(object):
+    """Phase times of one command run.
+
+    Phases nest (team translation happens inside formatting) and time
+    only counts for the innermost, so the phases add up to the total.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.phases = {}
+        self.replies = {'reply': 0, 'error': 0}
+        self._stack = []
+        self._mark = self.started
+
+    def _charge(self, now):
+        if self._stack:
+            phase = self._stack[-1]
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - self._mark
+        self._mark = now
+
+    def enter(self, phase):
+        self._charge(time.time())
+        self._stack.append(phase)
+
+    def exit(self):
+        self._charge(time.time())
+        self._stack.pop()
+
+
+class Timings(object):
+    """Rolling histograms of command phase times per sport and phase.
+
+    A command runs under timer(sport). While it does, phase(name) blocks
+    in that thread are charged to it. Outside a timer they cost nothing.
+    replies counts what commands sent back: {(sport, 'reply'|'error'): n}.
+    """
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.histograms = {}
+        self.replies = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def timer(self, sport):
+        timer = self._local.timer = Timer()
+        try:
+            yield timer
+        finally:
+            self._local.timer = None
+            total = time.time() - timer.started
+            timer.phases['other'] = max(0.0, total - sum(timer.phases.values()))
+            timer.phases['total'] = total
+            with self._lock:
+                for (phase, seconds) in timer.phases.items():
+                    if (sport, phase) not in self.histograms:
+                        self.histograms[(sport, phase)] = Histogram(self.size)
+                    self.histograms[(sport, phase)].add(seconds)
+                for (kind, count) in timer.replies.items():
+                    self.replies[(sport, kind)] = self.replies.get((sport, kind), 0) + count
+
+    @contextmanager
+    def phase(self, name):
+        timer = getattr(self._local, 'timer', None)
+        if not timer:
+            yield
+            return
+        timer.enter(name)
+        try:
+            yield
+        finally:
+            timer.exit()
+
+    def replied(self, kind='reply'):
+        """Count a reply (or error) of the command timed in this thread."""
+
+        timer = getattr(self._local, 'timer', None)
+        if timer:
+            timer.replies[kind] += 1
+
+    def summary(self):
+        """Return {sport: {phase: (count, p50, p95, p99)}}."""
+
+        with self._lock:
+            summary = {}
+            for ((sport, phase), histogram) in self.histograms.items():
+                summary.setdefault(sport, {})[phase] = tuple([histogram.count] + histogram.percentiles(50, 95, 99))
+            return summary
+
+    def sums(self):
+        """Return {(sport, phase): (count, sum)} of every sample ever added."""
+
+        with self._lock:
+            return dict([(key, (histogram.count, histogram.sum)) for (key, histogram) in self.histograms.items()])
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.replies.clear()
+
+
+class TimedIrc(object):
+    """Stands in for the irc a command gets so its replies are timed."""
+
+    def __init__(self, irc, timings):
+        self._irc = irc
+        self._timings = timings
+
+    def __getattr__(self, attr):
+        return getattr(self._irc, attr)
+
+    def reply(self, *args, **kwargs):
+        self._timings.replied('reply')
+        with self._timings.phase('reply'):
+            return self._irc.reply(*args, **kwargs)
+
+    def error(self, *args, **kwargs):
+        self._timings.replied('error')
+        with self._timings.phase('reply'):
+            return self._irc.error(*args, **kwargs)
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250:
@@ -0,0 +1,121 @@
+###
+# Copyright (c) 2012-2014, spline
+# All rights reserved.
+###
+
+import os
+import json
+import threading
+# supybot libs
+import supybot.utils as utils
+
+
+def gamekey(game):
+    """Return what finds game on the next board: upstream's id of it, which
+    tells a doubleheader's games apart. (away, home) if it has none.
+    """
+
+    return game.gameid or (game.awayabbr, game.homeabbr)
+
+
+def changes(old, new):
+    """Return what changed between two snapshots of a game, in the order
+    we announce them: start, score, period, redzone, final.
+    """
+
+    if new.state == 'pre':  # nothing to say until it starts.
+        return []
+    if new.state == 'post':
+        return ['final'] if old.state != 'post' else []
+    if old.state == 'pre':
+        return ['start']
+    found = []
+    if (old.awayscore, old.homescore) != (new.awayscore, new.homescore):
+        found.append('score')
+    if old.period != new.period:
+        found.append('period')
+    if new.redzone and not (old.redzone and old.possession == new.possession):  # entered, or the other team did.
+        found.append('redzone')
+    return found
+
+
+def diff(oldgames, newgames):
+    """Return [(game, changes)] for the games of newgames that changed since oldgames.
+    Games we did not see before are left out; they are the baseline for next time.
+    """
+
+    old = dict([(gamekey(game), game) for game in oldgames])
+    changed = []
+    for game in newgames:
+        previous = old.get(gamekey(game))
+        if previous is None or previous is game:
+            continue
+        found = changes(previous, game)
+        if found:
+            changed.append((game, found))
+    return changed
+
+
+class Watches(object):
+    """Team watches per channel, saved as JSON to path on every change.
+    Each is (network, channel, sport, team) with team lowercased.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._watches = set()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            self._watches = set([tuple([str(part) for part in watch]) for watch in json.load(f)])
+
+    def _save(self):
+        f = utils.file.AtomicFile(self.path)
+        json.dump(sorted(self._watches), f)
+        f.close()
+
+    def add(self, network, channel, sport, team):
+        """Watch team in channel. Returns False if it already was."""
+
+        watch = (network, channel, sport, team.lower())
+        with self._lock:
+            if watch in self._watches:
+                return False
+            self._watches.add(watch)
+            self._save()
+        return True
+
+    def remove(self, network, channel, sport, team):
+        """Stop watching team in channel. Returns False if it wasn't."""
+
+        watch = (network, channel, sport, team.lower())
+        with self._lock:
+            if watch not in self._watches:
+                return False
+            self._watches.remove(watch)
+            self._save()
+        return True
+
+    def channel(self, network, channel):
+        """Return [(sport, team)] watched in channel."""
+
+        with self._lock:
+            return sorted([(s, t) for (n, c, s, t) in self._watches if (n, c) == (network, channel)])
+
+    def sports(self):
+        """Return the set of sports anyone watches."""
+
+        with self._lock:
+            return set([s for (n, c, s, t) in self._watches])
+
+    def watchers(self, sport):
+        """Return [(network, channel, team)] watching sport."""
+
+        with self._lock:
+            return sorted([(n, c, t) for (n, c, s, t) in self._watches if s == sport])
+
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=250: